@@ -3,9 +3,10 @@ Configurações centralizadas para o ML Orchestrator.
 Define todos os fluxos, steps e suas dependências.
 """
 import os
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
-from enum import Enum
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from enum import Enum, IntEnum
 
 
 class FlowName(str, Enum):
@@ -18,34 +19,59 @@ class FlowName(str, Enum):
     ANALYSIS_TO_VACANCY = "analysis_to_vacancy"
 
 
-class StepStatus(str, Enum):
-    """Status possíveis de um step"""
-    SUCCESS = "success"
-    FAILED = "failed"
-    SKIPPED = "skipped"
-    CRITICAL_ERROR = "critical_error"
+class StepStatus(IntEnum):
+    """
+    Status possíveis de um step.
 
+    Int-backed: comparações de status no laço de execução viram um
+    compare de inteiros. Para serialização (respostas, logs), use o
+    atributo `label`.
+    """
+    SUCCESS = 1
+    FAILED = 2
+    SKIPPED = 3
+    CRITICAL_ERROR = 4
 
-@dataclass
+    @property
+    def label(self) -> str:
+        """Nome serializável do status (valor usado na API e nos logs)"""
+        return _STEP_STATUS_LABELS[self]
+
+
+_STEP_STATUS_LABELS = {
+    StepStatus.SUCCESS: "success",
+    StepStatus.FAILED: "failed",
+    StepStatus.SKIPPED: "skipped",
+    StepStatus.CRITICAL_ERROR: "critical_error",
+}
+
+
+@dataclass(frozen=True, slots=True)
 class FlowStep:
-    """Define um step individual em um fluxo"""
+    """Define um step individual em um fluxo (imutável e hashável)"""
     name: str
     function_name: str
     url_env_var: str
     timeout: int = 120
-    required_params: List[str] = field(default_factory=list)
+    required_params: Tuple[str, ...] = ()
     parallel_group: Optional[str] = None
-    
+    depends_on: Tuple[str, ...] = ()
+    category: Optional[str] = None  # 'vacancy' | 'profession' | None
+    cacheable: bool = True  # False para steps não idempotentes
+    # Steps da mesma onda com o mesmo batch_group são coalescidos em um
+    # único POST {"items": [...]} (o serviço precisa suportar lote)
+    batch_group: Optional[str] = None
+
     def get_url(self) -> Optional[str]:
-        """Obtém a URL do ambiente"""
-        return os.getenv(self.url_env_var)
+        """Obtém a URL do step (resolvida uma única vez no startup)"""
+        return STEP_URLS.get(self.name)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FlowDefinition:
-    """Define um fluxo completo"""
+    """Define um fluxo completo (imutável)"""
     name: str
-    steps: List[FlowStep]
+    steps: Tuple[FlowStep, ...]
     requires_embeddings: bool = False
     description: str = ""
 
@@ -60,7 +86,8 @@ class FlowConfig:
             function_name='_call_create_user_embeddings',
             url_env_var='DEFAULT_CREATE_USER_EMBEDDINGS_URL',
             timeout=300,
-            required_params=['session_id']
+            required_params=('session_id',),
+            cacheable=False
         ),
         
         # Steps de Vaga
@@ -68,61 +95,79 @@ class FlowConfig:
             name='match_candidato',
             function_name='_call_match_candidato',
             url_env_var='DEFAULT_MATCH_CANDIDATO_URL',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('create_embeddings',),
+            category='vacancy'
         ),
         'match_analysis_user_vacancy': FlowStep(
             name='match_analysis_user_vacancy',
             function_name='_call_match_analysis_user_vacancy',
             url_env_var='DEFAULT_MATCH_ANALYSIS_USER_VACANCY_URL',
             parallel_group='vacancy_parallel',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('create_embeddings',),
+            category='vacancy'
         ),
         'gap_analysis_user_vacancy': FlowStep(
             name='gap_analysis_user_vacancy',
             function_name='_call_gap_analysis_user_vacancy',
             url_env_var='DEFAULT_GAP_ANALYSIS_USER_VACANCY_URL',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('match_analysis_user_vacancy',),
+            category='vacancy'
         ),
         'suggest_course_vacancy': FlowStep(
             name='suggest_course_vacancy',
             function_name='_call_suggest_course_vacancy',
             url_env_var='DEFAULT_SUGGEST_COURSE_VACANCY_URL',
             parallel_group='vacancy_parallel',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('create_embeddings',),
+            category='vacancy'
         ),
-        
+
         # Steps de Profissão
         'match_usuario_profissao': FlowStep(
             name='match_usuario_profissao',
             function_name='_call_match_usuario_profissao',
             url_env_var='MATCH_USUARIO_PROFISSAO_URL',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('create_embeddings',),
+            category='profession'
         ),
         'match_usuario_carreira': FlowStep(
             name='match_usuario_carreira',
             function_name='_call_match_usuario_carreira',
             url_env_var='MATCH_USUARIO_CARREIRA_URL',
             parallel_group='profession_parallel',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('create_embeddings',),
+            category='profession'
         ),
         'match_analysis_user_profession': FlowStep(
             name='match_analysis_user_profession',
             function_name='_call_match_analysis_user_profession',
             url_env_var='MATCH_ANALYSIS_USER_PROFESSION_URL',
             parallel_group='profession_parallel',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('create_embeddings',),
+            category='profession'
         ),
         'gap_analysis_user_profession': FlowStep(
             name='gap_analysis_user_profession',
             function_name='_call_gap_analysis_user_profession',
             url_env_var='GAP_ANALYSIS_USER_PROFESSION_URL',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('match_analysis_user_profession',),
+            category='profession'
         ),
         'suggest_course_profession': FlowStep(
             name='suggest_course_profession',
             function_name='_call_suggest_course_profession',
             url_env_var='SUGGEST_COURSE_PROFESSION_URL',
-            required_params=['user_id']
+            required_params=('user_id',),
+            depends_on=('create_embeddings',),
+            category='profession'
         )
     }
     
@@ -132,7 +177,7 @@ class FlowConfig:
             name=FlowName.UPDATE_PROFILE,
             requires_embeddings=True,
             description="Fluxo completo com criação de embeddings",
-            steps=[
+            steps=(
                 STEPS['create_embeddings'],
                 STEPS['match_usuario_profissao'],
                 STEPS['match_candidato'],
@@ -143,14 +188,14 @@ class FlowConfig:
                 STEPS['match_analysis_user_vacancy'],
                 STEPS['gap_analysis_user_vacancy'],
                 STEPS['suggest_course_vacancy']
-            ]
+            )
         ),
         
         FlowName.FIRST_LOGIN: FlowDefinition(
             name=FlowName.FIRST_LOGIN,
             requires_embeddings=False,
             description="Fluxo inicial sem criação de embeddings",
-            steps=[
+            steps=(
                 STEPS['match_usuario_profissao'],
                 STEPS['match_candidato'],
                 STEPS['match_usuario_carreira'],
@@ -160,54 +205,198 @@ class FlowConfig:
                 STEPS['match_analysis_user_vacancy'],
                 STEPS['gap_analysis_user_vacancy'],
                 STEPS['suggest_course_vacancy']
-            ]
+            )
         ),
         
         FlowName.COURSE_TO_PROFESSION: FlowDefinition(
             name=FlowName.COURSE_TO_PROFESSION,
             requires_embeddings=False,
             description="Apenas sugestão de cursos para profissão",
-            steps=[STEPS['suggest_course_profession']]
+            steps=(STEPS['suggest_course_profession'],)
         ),
         
         FlowName.ANALYSIS_TO_PROFESSION: FlowDefinition(
             name=FlowName.ANALYSIS_TO_PROFESSION,
             requires_embeddings=False,
             description="Análise de skills para profissão",
-            steps=[
+            steps=(
                 STEPS['match_analysis_user_profession'],
                 STEPS['gap_analysis_user_profession']
-            ]
+            )
         ),
         
         FlowName.COURSE_TO_VACANCY: FlowDefinition(
             name=FlowName.COURSE_TO_VACANCY,
             requires_embeddings=False,
             description="Apenas sugestão de cursos para vaga",
-            steps=[STEPS['suggest_course_vacancy']]
+            steps=(STEPS['suggest_course_vacancy'],)
         ),
         
         FlowName.ANALYSIS_TO_VACANCY: FlowDefinition(
             name=FlowName.ANALYSIS_TO_VACANCY,
             requires_embeddings=False,
             description="Análise de skills para vaga",
-            steps=[
+            steps=(
                 STEPS['match_analysis_user_vacancy'],
                 STEPS['gap_analysis_user_vacancy']
-            ]
+            )
         )
     }
     
+    # Variantes filtradas de cada fluxo, pré-computadas por
+    # (flow_name, process_vacancy, process_profession). Preenchido abaixo.
+    FILTERED_FLOWS: Dict[Tuple[str, bool, bool], Tuple[FlowStep, ...]] = {}
+
+    # Ondas de execução pré-computadas para cada variante filtrada,
+    # mesma chave de FILTERED_FLOWS. Preenchido abaixo.
+    PRECOMPUTED_WAVES: Dict[Tuple[str, bool, bool], Tuple[Tuple[FlowStep, ...], ...]] = {}
+
+    # Parâmetros obrigatórios por fluxo: união dos required_params dos
+    # steps mais os campos exigidos em toda requisição. Preenchido abaixo.
+    REQUIRED_PARAMS: Dict[str, frozenset] = {}
+
     @classmethod
+    @lru_cache(maxsize=None)
     def get_flow(cls, flow_name: str) -> Optional[FlowDefinition]:
         """Retorna a definição de um fluxo específico"""
         return cls.FLOWS.get(flow_name)
-    
+
     @classmethod
+    @lru_cache(maxsize=None)
     def get_step(cls, step_name: str) -> Optional[FlowStep]:
         """Retorna a definição de um step específico"""
         return cls.STEPS.get(step_name)
 
+    @classmethod
+    def get_filtered_steps(cls,
+                          flow_name: str,
+                          process_vacancy: bool,
+                          process_profession: bool) -> Tuple[FlowStep, ...]:
+        """Retorna a variante pré-filtrada de um fluxo"""
+        return cls.FILTERED_FLOWS[(flow_name, process_vacancy, process_profession)]
+
+
+@lru_cache(maxsize=None)
+def build_waves(steps: Tuple[FlowStep, ...]) -> Tuple[Tuple[FlowStep, ...], ...]:
+    """
+    Agrupa steps em ondas de execução via ordenação topológica (Kahn).
+
+    Cada onda contém todos os steps cujas dependências (depends_on) já
+    foram satisfeitas; steps da mesma onda podem executar em paralelo.
+    Dependências referenciando steps fora da tupla (ex: create_embeddings
+    em fluxos sem embeddings) são ignoradas.
+
+    O resultado é determinístico por tupla de steps, então é memoizado —
+    as variantes conhecidas são pré-computadas no import e qualquer
+    combinação nova (ex: após regras de skip) é calculada uma única vez.
+
+    Args:
+        steps: Tupla de steps do fluxo (já filtrada)
+
+    Returns:
+        Tupla de ondas (tuplas de steps)
+    """
+    step_names = {step.name for step in steps}
+    by_name = {step.name: step for step in steps}
+    in_degree = {step.name: 0 for step in steps}
+    successors = {step.name: [] for step in steps}
+
+    for step in steps:
+        for dep in step.depends_on:
+            # Considera apenas arestas entre steps presentes no fluxo
+            if dep in step_names:
+                in_degree[step.name] += 1
+                successors[dep].append(step.name)
+
+    waves = []
+    ready = [step for step in steps if in_degree[step.name] == 0]
+    emitted = 0
+
+    while ready:
+        waves.append(tuple(ready))
+        emitted += len(ready)
+
+        next_ready = []
+        for step in ready:
+            for successor in successors[step.name]:
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    next_ready.append(by_name[successor])
+        ready = next_ready
+
+    # Ciclo de dependências: executa os restantes sequencialmente na ordem declarada
+    if emitted < len(steps):
+        import logging
+        remaining = [step for step in steps if in_degree[step.name] > 0]
+        logging.getLogger("ml_orchestrator.settings").warning(
+            "Dependency cycle detected among steps: %s",
+            ", ".join(s.name for s in remaining)
+        )
+        waves.extend((step,) for step in remaining)
+
+    return tuple(waves)
+
+
+def _build_filtered_flows() -> Dict[Tuple[str, bool, bool], Tuple[FlowStep, ...]]:
+    """
+    Pré-computa, em tempo de import, as variantes filtradas de cada fluxo
+    para as 4 combinações de (process_vacancy, process_profession).
+    Os fluxos são imutáveis, então a tabela nunca precisa ser invalidada.
+    """
+    filtered = {}
+
+    for flow_name, flow_def in FlowConfig.FLOWS.items():
+        for process_vacancy in (True, False):
+            for process_profession in (True, False):
+                steps = tuple(
+                    step for step in flow_def.steps
+                    if not (step.category == 'vacancy' and not process_vacancy)
+                    and not (step.category == 'profession' and not process_profession)
+                )
+                filtered[(flow_name, process_vacancy, process_profession)] = steps
+
+    return filtered
+
+
+FlowConfig.FILTERED_FLOWS = _build_filtered_flows()
+FlowConfig.PRECOMPUTED_WAVES = {
+    key: build_waves(steps) for key, steps in FlowConfig.FILTERED_FLOWS.items()
+}
+FlowConfig.REQUIRED_PARAMS = {
+    name: frozenset(('user_id', 'session_id')).union(
+        *(step.required_params for step in flow.steps)
+    )
+    for name, flow in FlowConfig.FLOWS.items()
+}
+
+
+# URLs dos steps resolvidas uma única vez no startup
+# (variáveis de ambiente são efetivamente imutáveis por processo)
+STEP_URLS: Dict[str, Optional[str]] = {}
+
+
+def refresh_urls() -> None:
+    """
+    (Re)resolve as URLs dos steps a partir das variáveis de ambiente.
+
+    Chamada no import; pode ser re-executada por testes que alteram o
+    ambiente em runtime. URLs ausentes são logadas para que a
+    misconfiguração apareça no startup, não no meio de um fluxo.
+    """
+    import logging
+
+    for name, step in FlowConfig.STEPS.items():
+        STEP_URLS[name] = os.environ.get(step.url_env_var)
+
+    missing = [name for name, url in STEP_URLS.items() if not url]
+    if missing:
+        logging.getLogger("ml_orchestrator.settings").warning(
+            "Step URLs not configured: %s", ", ".join(missing)
+        )
+
+
+refresh_urls()
+
 
 # Configurações do servidor
 SERVER_CONFIG = {
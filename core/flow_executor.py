@@ -2,14 +2,15 @@
 Flow Executor - Responsável por executar fluxos com gerenciamento de paralelismo.
 """
 import asyncio
+import logging
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Any, List, Optional
-from datetime import datetime
-import traceback
+from typing import Dict, Any, List, Optional, Tuple
 
-from config.settings import FlowStep, StepStatus
+from config.settings import FlowStep, StepStatus, build_waves
 from core.models import StepResult, ExecutionContext
 from core.step_executor import StepExecutor
+from utils.http_pool import close_session
 from utils.logger import get_logger
 
 
@@ -29,21 +30,67 @@ class FlowExecutor:
         self.step_executor = StepExecutor()
         self.max_workers = max_workers
         self.logger = logger
+
+        # Pool compartilhado para o caminho legado síncrono. Threads são
+        # criadas sob demanda no primeiro submit e reutilizadas entre
+        # grupos paralelos, em vez de um pool novo por grupo.
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="flow"
+        )
     
-    def execute_flow(self, 
-                    steps: List[FlowStep], 
+    def execute_flow(self,
+                    steps: List[FlowStep],
                     context: ExecutionContext) -> List[StepResult]:
         """
         Executa um fluxo completo com paralelismo controlado.
-        
+
+        Quando chamado fora de um event loop, delega para a versão
+        assíncrona (caminho preferido). Dentro de um loop ativo, mantém
+        o caminho legado baseado em threads para não bloquear o loop.
+
         Args:
             steps: Lista de steps a executar
             context: Contexto de execução
-            
+
         Returns:
             Lista de resultados da execução
         """
-        self.logger.info(
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._execute_flow_async_once(steps, context))
+
+        return self._execute_flow_sync(steps, context)
+
+    async def _execute_flow_async_once(self,
+                                       steps: List[FlowStep],
+                                       context: ExecutionContext) -> List[StepResult]:
+        """
+        Executa o fluxo e fecha a sessão aiohttp antes do loop terminar.
+
+        Usado pelo shim síncrono acima: o asyncio.run cria um loop
+        efêmero, e a sessão compartilhada de utils.http_pool nasce
+        amarrada a ele — sem este fechamento ela vaza junto com seus
+        sockets a cada chamada fora de loop.
+        """
+        try:
+            return await self.execute_flow_async(steps, context)
+        finally:
+            await close_session()
+
+    def _execute_flow_sync(self,
+                          steps: List[FlowStep],
+                          context: ExecutionContext) -> List[StepResult]:
+        """Caminho legado de execução síncrona (threads para grupos paralelos)"""
+        # Liga os métodos do logger a locais: evita re-resolver
+        # self.logger a cada chamada no laço de agendamento
+        log_info = self.logger.info
+        log_debug = self.logger.debug
+        log_error = self.logger.error
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+        log_info(
             "flow_execution_start",
             execution_id=context.execution_id,
             flow_name=context.flow_name,
@@ -53,34 +100,37 @@ class FlowExecutor:
         # Agrupa steps por possibilidade de paralelismo
         step_groups = self._group_steps_by_parallelism(steps)
         
-        self.logger.debug(
-            "step_groups_created",
-            execution_id=context.execution_id,
-            group_count=len(step_groups),
-            groups=[{"size": len(g), "parallel": g[0].parallel_group if g else None} for g in step_groups]
-        )
+        if debug_enabled:
+            log_debug(
+                "step_groups_created",
+                execution_id=context.execution_id,
+                group_count=len(step_groups),
+                groups=[[s.name for s in g] for g in step_groups]
+            )
         
         results = []
         
         # Executa cada grupo de steps
         for group_index, group in enumerate(step_groups):
-            self.logger.debug(
-                "executing_step_group",
-                execution_id=context.execution_id,
-                group_index=group_index,
-                group_size=len(group),
-                is_parallel=len(group) > 1
-            )
+            if debug_enabled:
+                log_debug(
+                    "executing_step_group",
+                    execution_id=context.execution_id,
+                    group_index=group_index,
+                    group_size=len(group),
+                    is_parallel=len(group) > 1
+                )
             
             if len(group) == 1:
-                # Execução sequencial
+                # Onda degenerada de um único step: chamada direta,
+                # sem passar pelo pool de threads
                 result = self._execute_single_step(group[0], context)
                 results.append(result)
                 context.add_result(result)
                 
                 # Se houve erro crítico, interrompe o fluxo
                 if result.status == StepStatus.CRITICAL_ERROR:
-                    self.logger.error(
+                    log_error(
                         "flow_aborted",
                         execution_id=context.execution_id,
                         reason="critical_error",
@@ -97,8 +147,9 @@ class FlowExecutor:
                     context.add_result(result)
                 
                 # Se algum step paralelo teve erro crítico, interrompe
-                if any(r.status == StepStatus.CRITICAL_ERROR for r in group_results):
-                    self.logger.error(
+                # (checagem O(1) via contadores incrementais do contexto)
+                if context.has_critical_errors():
+                    log_error(
                         "flow_aborted",
                         execution_id=context.execution_id,
                         reason="critical_error_in_parallel_group",
@@ -106,59 +157,33 @@ class FlowExecutor:
                     )
                     break
         
-        self.logger.info(
+        log_info(
             "flow_execution_end",
             execution_id=context.execution_id,
             flow_name=context.flow_name,
             total_results=len(results),
-            successful_steps=len([r for r in results if r.status == StepStatus.SUCCESS]),
-            failed_steps=len([r for r in results if r.status in [StepStatus.FAILED, StepStatus.CRITICAL_ERROR]])
+            successful_steps=context.count_by_status(StepStatus.SUCCESS),
+            failed_steps=context.count_by_status(StepStatus.FAILED) + context.count_by_status(StepStatus.CRITICAL_ERROR)
         )
         
         return results
     
-    def _group_steps_by_parallelism(self, steps: List[FlowStep]) -> List[List[FlowStep]]:
+    def _group_steps_by_parallelism(self, steps: List[FlowStep]) -> Tuple[Tuple[FlowStep, ...], ...]:
         """
-        Agrupa steps que podem executar em paralelo.
-        
-        Steps com o mesmo parallel_group podem executar juntos.
-        Steps sem parallel_group executam sequencialmente.
-        
+        Retorna as ondas de execução (topológicas) para os steps.
+
+        O agrupamento é determinístico por tupla de steps e memoizado em
+        config.settings.build_waves — as variantes conhecidas já foram
+        pré-computadas no import, então em tempo de requisição isto é um
+        lookup de cache.
+
         Args:
-            steps: Lista de steps
-            
+            steps: Steps do fluxo (já filtrados)
+
         Returns:
-            Lista de grupos de steps
+            Tupla de ondas (tuplas de steps)
         """
-        groups = []
-        current_group = []
-        current_parallel_group = None
-        
-        for step in steps:
-            if step.parallel_group:
-                # Step faz parte de um grupo paralelo
-                if step.parallel_group == current_parallel_group:
-                    # Adiciona ao grupo atual
-                    current_group.append(step)
-                else:
-                    # Novo grupo paralelo
-                    if current_group:
-                        groups.append(current_group)
-                    current_group = [step]
-                    current_parallel_group = step.parallel_group
-            else:
-                # Step sequencial
-                if current_group:
-                    groups.append(current_group)
-                    current_group = []
-                    current_parallel_group = None
-                groups.append([step])
-        
-        # Adiciona último grupo se existir
-        if current_group:
-            groups.append(current_group)
-        
-        return groups
+        return build_waves(tuple(steps))
     
     def _execute_single_step(self, 
                            step: FlowStep, 
@@ -173,11 +198,12 @@ class FlowExecutor:
         Returns:
             Resultado da execução
         """
-        self.logger.debug(
-            "executing_single_step",
-            execution_id=context.execution_id,
-            step_name=step.name
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "executing_single_step",
+                execution_id=context.execution_id,
+                step_name=step.name
+            )
         
         return self.step_executor.execute_step(step, context)
     
@@ -194,7 +220,13 @@ class FlowExecutor:
         Returns:
             Lista de resultados
         """
-        self.logger.info(
+        # Locais para o laço de coleta (mesmo padrão do caminho principal)
+        log_info = self.logger.info
+        log_debug = self.logger.debug
+        log_error = self.logger.error
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+        log_info(
             "executing_parallel_group",
             execution_id=context.execution_id,
             step_names=[s.name for s in steps],
@@ -202,70 +234,307 @@ class FlowExecutor:
         )
         
         results = []
-        
-        with ThreadPoolExecutor(max_workers=min(len(steps), self.max_workers)) as executor:
-            # Submete todos os steps para execução
-            future_to_step = {
-                executor.submit(self.step_executor.execute_step, step, context): step
-                for step in steps
-            }
-            
-            # Coleta resultados conforme completam
-            for future in as_completed(future_to_step):
-                step = future_to_step[future]
-                
-                try:
-                    result = future.result()
-                    results.append(result)
-                    
-                    self.logger.debug(
+
+        # Submete todos os steps para o pool compartilhado (o limite de
+        # workers do pool já faz o papel do cap por grupo)
+        future_to_step = {
+            self._pool.submit(self.step_executor.execute_step, step, context): step
+            for step in steps
+        }
+
+        # Coleta resultados conforme completam
+        for future in as_completed(future_to_step):
+            step = future_to_step[future]
+
+            try:
+                result = future.result()
+                results.append(result)
+
+                if debug_enabled:
+                    log_debug(
                         "parallel_step_completed",
                         execution_id=context.execution_id,
                         step_name=step.name,
-                        status=result.status
+                        status=result.status.label
                     )
-                    
-                except Exception as e:
-                    # Captura exceções não tratadas
-                    error_msg = str(e)
-                    error_details = traceback.format_exc()
-                    
-                    self.logger.error(
-                        "parallel_step_exception",
-                        execution_id=context.execution_id,
-                        step_name=step.name,
-                        error=error_msg,
-                        traceback=error_details
-                    )
-                    
-                    # Cria resultado de erro
-                    result = StepResult(
-                        step_name=step.name,
-                        status=StepStatus.CRITICAL_ERROR,
-                        duration=0.0,
-                        started_at=datetime.utcnow(),
-                        completed_at=datetime.utcnow(),
-                        error=f"Unhandled exception: {error_msg}",
-                        error_details=error_details
-                    )
-                    results.append(result)
-        
-        self.logger.info(
+
+            except Exception as e:
+                # Captura exceções não tratadas (import adiado: só
+                # pagamos o custo do traceback no caminho de erro)
+                import traceback
+                error_msg = str(e)
+                error_details = traceback.format_exc()
+
+                log_error(
+                    "parallel_step_exception",
+                    execution_id=context.execution_id,
+                    step_name=step.name,
+                    error=error_msg,
+                    traceback=error_details
+                )
+
+                # Cria resultado de erro
+                result = StepResult(
+                    step_name=step.name,
+                    status=StepStatus.CRITICAL_ERROR,
+                    duration=0.0,
+                    started_at=time.time_ns(),
+                    completed_at=time.time_ns(),
+                    error=f"Unhandled exception: {error_msg}",
+                    error_details=error_details
+                )
+                results.append(result)
+
+        log_info(
             "parallel_group_completed",
             execution_id=context.execution_id,
             total_steps=len(steps),
-            successful=len([r for r in results if r.status == StepStatus.SUCCESS]),
-            failed=len([r for r in results if r.status != StepStatus.SUCCESS])
+            successful=sum(1 for r in results if r.status == StepStatus.SUCCESS),
+            failed=sum(1 for r in results if r.status != StepStatus.SUCCESS)
         )
         
         return results
     
-    def execute_flow_async(self, 
-                          steps: List[FlowStep], 
-                          context: ExecutionContext) -> List[StepResult]:
+    async def execute_flow_async(self,
+                                steps: List[FlowStep],
+                                context: ExecutionContext) -> List[StepResult]:
         """
-        Versão assíncrona da execução de fluxo (para futura migração).
-        
-        Por enquanto, apenas chama a versão síncrona.
+        Executa um fluxo completo de forma assíncrona.
+
+        Wrapper fino sobre execute_flow_iter que materializa a lista
+        completa de resultados (interface histórica do executor).
+
+        Args:
+            steps: Lista de steps a executar
+            context: Contexto de execução
+
+        Returns:
+            Lista de resultados da execução
+        """
+        return [result async for result in self.execute_flow_iter(steps, context)]
+
+    async def execute_flow_iter(self,
+                               steps: List[FlowStep],
+                               context: ExecutionContext):
+        """
+        Executa um fluxo produzindo resultados conforme as ondas completam.
+
+        Gerador assíncrono: o pico de memória fica em O(largura da onda)
+        em vez de O(total de steps), e consumidores podem transmitir
+        resultados parciais (ex: resposta HTTP em streaming) ou abortar
+        cedo. Um único event loop multiplexa todo o I/O HTTP dos grupos
+        paralelos, sem custo de criação de threads por grupo.
+
+        Args:
+            steps: Lista de steps a executar
+            context: Contexto de execução
+
+        Yields:
+            StepResult de cada step, na ordem de conclusão das ondas
+        """
+        # Liga os métodos do logger a locais: evita re-resolver
+        # self.logger a cada chamada no laço de agendamento
+        log_info = self.logger.info
+        log_debug = self.logger.debug
+        log_error = self.logger.error
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+        log_info(
+            "flow_execution_start",
+            execution_id=context.execution_id,
+            flow_name=context.flow_name,
+            total_steps=len(steps)
+        )
+
+        # Agrupa steps por possibilidade de paralelismo
+        step_groups = self._group_steps_by_parallelism(steps)
+
+        if debug_enabled:
+            log_debug(
+                "step_groups_created",
+                execution_id=context.execution_id,
+                group_count=len(step_groups),
+                groups=[[s.name for s in g] for g in step_groups]
+            )
+
+        emitted = 0
+
+        # Executa cada grupo de steps
+        for group_index, group in enumerate(step_groups):
+            if debug_enabled:
+                log_debug(
+                    "executing_step_group",
+                    execution_id=context.execution_id,
+                    group_index=group_index,
+                    group_size=len(group),
+                    is_parallel=len(group) > 1
+                )
+
+            if len(group) == 1:
+                # Onda degenerada de um único step: await direto, sem o
+                # overhead de criar tasks e asyncio.gather
+                result = await self.step_executor.execute_step_async(group[0], context)
+                context.add_result(result)
+                emitted += 1
+                yield result
+
+                # Se houve erro crítico, interrompe o fluxo
+                if result.status == StepStatus.CRITICAL_ERROR:
+                    log_error(
+                        "flow_aborted",
+                        execution_id=context.execution_id,
+                        reason="critical_error",
+                        failed_step=result.step_name
+                    )
+                    break
+            else:
+                # Execução paralela
+                group_results = await self._execute_parallel_steps_async(group, context)
+
+                # Adiciona resultados ao contexto e os repassa
+                for result in group_results:
+                    context.add_result(result)
+                    emitted += 1
+                    yield result
+
+                # Se algum step paralelo teve erro crítico, interrompe
+                # (checagem O(1) via contadores incrementais do contexto)
+                if context.has_critical_errors():
+                    log_error(
+                        "flow_aborted",
+                        execution_id=context.execution_id,
+                        reason="critical_error_in_parallel_group",
+                        failed_steps=[r.step_name for r in group_results if r.status == StepStatus.CRITICAL_ERROR]
+                    )
+                    break
+
+        log_info(
+            "flow_execution_end",
+            execution_id=context.execution_id,
+            flow_name=context.flow_name,
+            total_results=emitted,
+            successful_steps=context.count_by_status(StepStatus.SUCCESS),
+            failed_steps=context.count_by_status(StepStatus.FAILED) + context.count_by_status(StepStatus.CRITICAL_ERROR)
+        )
+
+    async def _execute_parallel_steps_async(self,
+                                           steps: List[FlowStep],
+                                           context: ExecutionContext) -> List[StepResult]:
         """
-        return self.execute_flow(steps, context)
\ No newline at end of file
+        Executa múltiplos steps em paralelo no event loop.
+
+        Args:
+            steps: Steps a executar em paralelo
+            context: Contexto de execução
+
+        Returns:
+            Lista de resultados
+        """
+        # Locais para o laço de coleta (mesmo padrão do caminho principal)
+        log_info = self.logger.info
+        log_debug = self.logger.debug
+        log_error = self.logger.error
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+        log_info(
+            "executing_parallel_group",
+            execution_id=context.execution_id,
+            step_names=[s.name for s in steps],
+            parallel_group=steps[0].parallel_group if steps else None
+        )
+
+        # Particiona a onda: steps com o mesmo batch_group são coalescidos
+        # em um único POST; os demais seguem o caminho individual
+        batch_groups: Dict[str, List[FlowStep]] = {}
+        coros = []
+        owners: List[Any] = []  # FlowStep ou lista de steps de um lote
+
+        for step in steps:
+            if step.batch_group:
+                batch_groups.setdefault(step.batch_group, []).append(step)
+            else:
+                coros.append(self.step_executor.execute_step_async(step, context))
+                owners.append(step)
+
+        for group_steps in batch_groups.values():
+            if len(group_steps) == 1:
+                # Grupo degenerado: coalescer um step só não economiza nada
+                coros.append(self.step_executor.execute_step_async(group_steps[0], context))
+                owners.append(group_steps[0])
+            else:
+                coros.append(self.step_executor.execute_batch_async(group_steps, context))
+                owners.append(group_steps)
+
+        gathered = await asyncio.gather(*coros, return_exceptions=True)
+
+        # Achata os lotes preservando o pareamento step -> resultado
+        paired = []
+        for owner, outcome in zip(owners, gathered):
+            if isinstance(owner, list):
+                if isinstance(outcome, BaseException):
+                    paired.extend((s, outcome) for s in owner)
+                else:
+                    paired.extend(zip(owner, outcome))
+            else:
+                paired.append((owner, outcome))
+
+        results = []
+
+        for step, outcome in paired:
+            if isinstance(outcome, BaseException):
+                # Captura exceções não tratadas (import adiado: só
+                # pagamos o custo do traceback no caminho de erro)
+                import traceback
+                error_msg = str(outcome)
+                error_details = "".join(
+                    traceback.format_exception(type(outcome), outcome, outcome.__traceback__)
+                )
+
+                log_error(
+                    "parallel_step_exception",
+                    execution_id=context.execution_id,
+                    step_name=step.name,
+                    error=error_msg,
+                    traceback=error_details
+                )
+
+                # Cria resultado de erro
+                results.append(StepResult(
+                    step_name=step.name,
+                    status=StepStatus.CRITICAL_ERROR,
+                    duration=0.0,
+                    started_at=time.time_ns(),
+                    completed_at=time.time_ns(),
+                    error=f"Unhandled exception: {error_msg}",
+                    error_details=error_details
+                ))
+            else:
+                results.append(outcome)
+
+                if debug_enabled:
+                    log_debug(
+                        "parallel_step_completed",
+                        execution_id=context.execution_id,
+                        step_name=step.name,
+                        status=outcome.status.label
+                    )
+
+        log_info(
+            "parallel_group_completed",
+            execution_id=context.execution_id,
+            total_steps=len(steps),
+            successful=sum(1 for r in results if r.status == StepStatus.SUCCESS),
+            failed=sum(1 for r in results if r.status != StepStatus.SUCCESS)
+        )
+
+        return results
+
+    def close(self):
+        """Libera o pool de threads e os recursos síncronos do executor de steps"""
+        self._pool.shutdown(wait=False)
+        self.step_executor.close()
+
+    async def aclose(self):
+        """Libera todos os recursos, incluindo a sessão HTTP assíncrona"""
+        self._pool.shutdown(wait=False)
+        await self.step_executor.aclose()
\ No newline at end of file
@@ -1,7 +1,8 @@
 """
 Flow Router - Responsável por determinar qual fluxo executar e filtrar steps.
 """
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from config.settings import FlowConfig, FlowDefinition, FlowName, FlowStep
 from utils.logger import get_logger
 
@@ -9,13 +10,137 @@ from utils.logger import get_logger
 logger = get_logger("flow_router")
 
 
+# Tabela de despacho ordenada: primeira flag ativa determina o fluxo
+_FLOW_DISPATCH = (
+    ('process_only_profession_course', FlowName.COURSE_TO_PROFESSION),
+    ('process_only_profession_skills', FlowName.ANALYSIS_TO_PROFESSION),
+    ('process_only_vacancy_course', FlowName.COURSE_TO_VACANCY),
+    ('process_only_vacancy_skills', FlowName.ANALYSIS_TO_VACANCY),
+    ('create_user_embedding', FlowName.UPDATE_PROFILE),
+)
+
+# Campos que determinam completamente o roteamento: (nome, default)
+_ROUTE_KEY_FIELDS = (
+    ('process_only_profession_course', False),
+    ('process_only_profession_skills', False),
+    ('process_only_vacancy_course', False),
+    ('process_only_vacancy_skills', False),
+    ('create_user_embedding', False),
+    ('process_vacancy_orchestrator', True),
+    ('process_profession_orchestrator', True),
+    ('position_id', None),
+    ('career_name', None),
+    ('vacancy_id', None),
+)
+
+# Limite de entradas do cache de rotas (o espaço de chaves já é pequeno)
+_ROUTE_CACHE_MAX = 1024
+
+
+def _skip_if_position_id(request_data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    if request_data.get('position_id'):
+        return True, "position_id provided"
+    return False, None
+
+
+def _skip_if_vacancy_id(request_data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    if request_data.get('vacancy_id'):
+        return True, "vacancy_id provided"
+    return False, None
+
+
+def _skip_if_position_and_career(request_data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    if request_data.get('position_id') and request_data.get('career_name'):
+        return True, "both position_id and career_name provided"
+    return False, None
+
+
+# Predicados de skip pré-compilados por step: um lookup + uma chamada por
+# step, em vez de uma cascata de comparações de nome por avaliação. Steps
+# fora da tabela nunca são pulados por contexto.
+_SKIP_PREDICATES: Dict[str, Callable[[Dict[str, Any]], Tuple[bool, Optional[str]]]] = {
+    'match_usuario_profissao': _skip_if_position_id,
+    'match_candidato': _skip_if_vacancy_id,
+    'match_usuario_carreira': _skip_if_position_and_career,
+}
+
+# Fallback para fluxos desconhecidos (campos exigidos em toda requisição)
+_DEFAULT_REQUIRED_PARAMS = frozenset(('user_id', 'session_id'))
+
+
 class FlowRouter:
     """Roteador de fluxos baseado em parâmetros da requisição"""
     
     def __init__(self):
         self.flows = FlowConfig.FLOWS
         self.logger = logger
-    
+
+        # Cache de roteamento por forma da requisição (bitmask das flags)
+        self._route_cache: Dict[int, Tuple[str, Tuple[FlowStep, ...]]] = {}
+
+    def _cache_key(self, request_data: Dict[str, Any]) -> int:
+        """Empacota os campos de roteamento em um int para usar como chave"""
+        key = 0
+        for index, (name, default) in enumerate(_ROUTE_KEY_FIELDS):
+            if bool(request_data.get(name, default)):
+                key |= 1 << index
+        return key
+
+    def route(self, request_data: Dict[str, Any]) -> Tuple[str, Tuple[FlowStep, ...], Tuple[Tuple[str, str], ...]]:
+        """
+        Resolve (flow_name, steps a executar, steps pulados) para uma requisição.
+
+        O resultado depende apenas de um punhado de flags booleanas e da
+        presença de alguns ids, então é memoizado por um bitmask — formas
+        repetidas de requisição viram um único lookup de dicionário.
+        As regras de skip são aplicadas aqui, uma única vez, em vez de
+        uma vez por step durante a execução.
+
+        Args:
+            request_data: Dados da requisição
+
+        Returns:
+            Tupla (nome do fluxo, steps a executar, tuplas (step_name, razão) pulados)
+        """
+        key = self._cache_key(request_data)
+        cached = self._route_cache.get(key)
+        if cached is not None:
+            return cached
+
+        flow_name = self.determine_flow(request_data)
+        flow_def = self.get_flow_definition(flow_name)
+        steps = self.filter_steps_by_context(flow_def, request_data)
+        executable, skipped = self._apply_skip_rules(steps, request_data)
+
+        result = (flow_name, executable, skipped)
+        if len(self._route_cache) < _ROUTE_CACHE_MAX:
+            self._route_cache[key] = result
+        return result
+
+    def _apply_skip_rules(self,
+                         steps: Tuple[FlowStep, ...],
+                         request_data: Dict[str, Any]) -> Tuple[Tuple[FlowStep, ...], Tuple[Tuple[str, str], ...]]:
+        """
+        Aplica as regras de skip uma única vez, fora do loop de execução.
+
+        Returns:
+            Tupla (steps a executar, tuplas (step_name, razão) dos pulados)
+        """
+        skipped = []
+        executable = []
+
+        for step in steps:
+            should_skip, reason = self.should_skip_step(step, request_data)
+            if should_skip:
+                skipped.append((step.name, reason))
+            else:
+                executable.append(step)
+
+        if not skipped:
+            return steps, ()
+
+        return tuple(executable), tuple(skipped)
+
     def determine_flow(self, request_data: Dict[str, Any]) -> str:
         """
         Determina qual fluxo executar baseado nos parâmetros da requisição.
@@ -26,47 +151,25 @@ class FlowRouter:
         Returns:
             Nome do fluxo a ser executado
         """
-        # Log dos parâmetros de decisão
-        self.logger.debug(
-            "flow_determination",
-            process_only_profession_course=request_data.get('process_only_profession_course', False),
-            process_only_profession_skills=request_data.get('process_only_profession_skills', False),
-            process_only_vacancy_course=request_data.get('process_only_vacancy_course', False),
-            process_only_vacancy_skills=request_data.get('process_only_vacancy_skills', False),
-            create_user_embedding=request_data.get('create_user_embedding', False)
-        )
-        
-        # Fluxos específicos de profissão
-        if request_data.get('process_only_profession_course'):
-            flow_name = FlowName.COURSE_TO_PROFESSION
-            self.logger.info("flow_selected", flow_name=flow_name, reason="process_only_profession_course=True")
-            return flow_name
-        
-        if request_data.get('process_only_profession_skills'):
-            flow_name = FlowName.ANALYSIS_TO_PROFESSION
-            self.logger.info("flow_selected", flow_name=flow_name, reason="process_only_profession_skills=True")
-            return flow_name
-        
-        # Fluxos específicos de vaga
-        if request_data.get('process_only_vacancy_course'):
-            flow_name = FlowName.COURSE_TO_VACANCY
-            self.logger.info("flow_selected", flow_name=flow_name, reason="process_only_vacancy_course=True")
-            return flow_name
-        
-        if request_data.get('process_only_vacancy_skills'):
-            flow_name = FlowName.ANALYSIS_TO_VACANCY
-            self.logger.info("flow_selected", flow_name=flow_name, reason="process_only_vacancy_skills=True")
-            return flow_name
-        
-        # Fluxos padrão
-        if request_data.get('create_user_embedding', False):
-            flow_name = FlowName.UPDATE_PROFILE
-            self.logger.info("flow_selected", flow_name=flow_name, reason="create_user_embedding=True")
-            return flow_name
-        
+        # Locais para o laço de despacho (evita re-resolver self.logger)
+        log_info = self.logger.info
+
+        # Log dos parâmetros de decisão (kwargs só são montados em DEBUG)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "flow_determination",
+                **{flag: request_data.get(flag, False) for flag, _ in _FLOW_DISPATCH}
+            )
+
+        # Primeira flag ativa na tabela de despacho determina o fluxo
+        for flag, flow_name in _FLOW_DISPATCH:
+            if request_data.get(flag):
+                log_info("flow_selected", flow_name=flow_name, reason=f"{flag}=True")
+                return flow_name
+
         # Fluxo padrão quando nenhuma flag específica está ativa
         flow_name = FlowName.FIRST_LOGIN
-        self.logger.info("flow_selected", flow_name=flow_name, reason="default_flow")
+        log_info("flow_selected", flow_name=flow_name, reason="default_flow")
         return flow_name
     
     def get_flow_definition(self, flow_name: str) -> FlowDefinition:
@@ -83,63 +186,45 @@ class FlowRouter:
             ValueError: Se o fluxo não existir
         """
         flow_def = self.flows.get(flow_name)
-        
+
         if not flow_def:
             self.logger.error("unknown_flow", flow_name=flow_name)
             raise ValueError(f"Unknown flow: {flow_name}")
-        
-        self.logger.debug(
-            "flow_definition_retrieved",
-            flow_name=flow_name,
-            step_count=len(flow_def.steps),
-            requires_embeddings=flow_def.requires_embeddings
-        )
-        
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "flow_definition_retrieved",
+                flow_name=flow_name,
+                step_count=len(flow_def.steps),
+                requires_embeddings=flow_def.requires_embeddings
+            )
+
         return flow_def
     
-    def filter_steps_by_context(self, 
-                               flow_def: FlowDefinition, 
-                               request_data: Dict[str, Any]) -> List[FlowStep]:
+    def filter_steps_by_context(self,
+                               flow_def: FlowDefinition,
+                               request_data: Dict[str, Any]) -> Tuple[FlowStep, ...]:
         """
         Filtra os steps baseado no contexto da requisição.
         Remove steps de vaga ou profissão conforme as flags.
-        
+
+        As variantes filtradas são pré-computadas em FlowConfig, então
+        aqui o custo é um único lookup de dicionário.
+
         Args:
             flow_def: Definição do fluxo
             request_data: Dados da requisição
-            
+
         Returns:
-            Lista filtrada de steps
+            Tupla filtrada de steps
         """
         process_vacancy = request_data.get('process_vacancy_orchestrator', True)
         process_profession = request_data.get('process_profession_orchestrator', True)
-        
-        # Se ambas as flags são True, retorna todos os steps
-        if process_vacancy and process_profession:
-            self.logger.debug(
-                "steps_filter",
-                action="no_filter",
-                original_count=len(flow_def.steps),
-                filtered_count=len(flow_def.steps)
-            )
-            return flow_def.steps
-        
-        filtered_steps = []
-        
-        for step in flow_def.steps:
-            # Se é um step de vaga e não devemos processar vagas
-            if 'vacancy' in step.name and not process_vacancy:
-                self.logger.debug("step_filtered_out", step_name=step.name, reason="vacancy_disabled")
-                continue
-            
-            # Se é um step de profissão e não devemos processar profissões
-            if ('profession' in step.name or 'carreira' in step.name) and not process_profession:
-                self.logger.debug("step_filtered_out", step_name=step.name, reason="profession_disabled")
-                continue
-            
-            # Step não é específico ou deve ser incluído
-            filtered_steps.append(step)
-        
+
+        filtered_steps = FlowConfig.get_filtered_steps(
+            flow_def.name, process_vacancy, process_profession
+        )
+
         self.logger.info(
             "steps_filtered",
             original_count=len(flow_def.steps),
@@ -147,7 +232,7 @@ class FlowRouter:
             process_vacancy=process_vacancy,
             process_profession=process_profession
         )
-        
+
         return filtered_steps
     
     def should_skip_step(self, 
@@ -163,19 +248,10 @@ class FlowRouter:
         Returns:
             Tupla (should_skip, reason)
         """
-        # Pula match_usuario_profissao se position_id foi fornecido
-        if step.name == 'match_usuario_profissao' and request_data.get('position_id'):
-            return True, "position_id provided"
-        
-        # Pula match_candidato se vacancy_id foi fornecido
-        if step.name == 'match_candidato' and request_data.get('vacancy_id'):
-            return True, "vacancy_id provided"
-        
-        # Pula match_usuario_carreira se position_id E career_name foram fornecidos
-        if step.name == 'match_usuario_carreira':
-            if request_data.get('position_id') and request_data.get('career_name'):
-                return True, "both position_id and career_name provided"
-        
+        predicate = _SKIP_PREDICATES.get(step.name)
+        if predicate is not None:
+            return predicate(request_data)
+
         return False, None
     
     def validate_flow_params(self, 
@@ -191,22 +267,25 @@ class FlowRouter:
         Returns:
             Lista de erros de validação (vazia se tudo OK)
         """
-        errors = []
-        
-        # Parâmetros obrigatórios para todos os fluxos
-        if not request_data.get('user_id'):
-            errors.append("Missing required parameter: user_id")
-        
-        if not request_data.get('session_id'):
-            errors.append("Missing required parameter: session_id")
-        
+        # Conjunto pré-computado de parâmetros obrigatórios do fluxo
+        # (união dos required_params dos steps + campos sempre exigidos)
+        required = FlowConfig.REQUIRED_PARAMS.get(
+            flow_name, _DEFAULT_REQUIRED_PARAMS
+        )
+        provided = {key for key, value in request_data.items() if value}
+
+        errors = [
+            f"Missing required parameter: {name}"
+            for name in sorted(required - provided)
+        ]
+
         # Validações específicas por fluxo
         flow_def = self.flows.get(flow_name)
         if flow_def:
             # Se requer embeddings, precisa do session_id válido
-            if flow_def.requires_embeddings and not request_data.get('session_id'):
+            if flow_def.requires_embeddings and 'session_id' not in provided:
                 errors.append("Flow requires embeddings but session_id is missing")
-        
+
         if errors:
             self.logger.warning(
                 "flow_validation_failed",
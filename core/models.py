@@ -1,41 +1,53 @@
 """
 Modelos de dados para o sistema de orquestração.
 """
+from collections import Counter, deque
 from dataclasses import dataclass, field
-from typing import Any, Optional, Dict, List
-from datetime import datetime
+from typing import Any, Optional, Deque, Dict, List
+from datetime import datetime, timezone
 from config.settings import StepStatus
 
 
-@dataclass
+def ns_to_iso(ns: int) -> str:
+    """Formata um timestamp em nanossegundos (epoch) como ISO-8601 UTC"""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass(slots=True)
 class StepResult:
-    """Resultado da execução de um step individual"""
+    """
+    Resultado da execução de um step individual.
+
+    slots=True: atributos em slots fixos em vez de __dict__ por
+    instância — construção e acesso mais baratos e ~200 bytes a menos
+    por resultado, o que soma no loop de montagem da resposta.
+    """
     step_name: str
     status: StepStatus
     duration: float
-    started_at: datetime
-    completed_at: datetime
+    started_at: int  # epoch em nanossegundos (time.time_ns)
+    completed_at: int  # epoch em nanossegundos (time.time_ns)
     response: Optional[Any] = None
     error: Optional[str] = None
     error_details: Optional[str] = None
     url: Optional[str] = None
     status_code: Optional[int] = None
-    
+
     def to_dict(self) -> Dict[str, Any]:
-        """Converte o resultado para dicionário"""
+        """Converte o resultado para dicionário (timestamps formatados sob demanda)"""
         return {
             "step_name": self.step_name,
-            "status": self.status,
+            "status": self.status.label,
             "duration": self.duration,
-            "started_at": self.started_at.isoformat(),
-            "completed_at": self.completed_at.isoformat(),
+            "started_at": ns_to_iso(self.started_at),
+            "completed_at": ns_to_iso(self.completed_at),
             "error": self.error,
             "url": self.url,
             "status_code": self.status_code
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ExecutionContext:
     """Contexto de execução compartilhado entre steps"""
     execution_id: str
@@ -43,16 +55,22 @@ class ExecutionContext:
     session_id: str
     flow_name: str
     request_data: Dict[str, Any]
-    results: List[StepResult] = field(default_factory=list)
-    
+    results: Deque[StepResult] = field(default_factory=deque)
+    _status_counts: Counter = field(default_factory=Counter)
+
     def add_result(self, result: StepResult):
-        """Adiciona um resultado ao contexto"""
+        """Adiciona um resultado ao contexto (append thread-safe + contadores)"""
         self.results.append(result)
-    
+        self._status_counts[result.status] += 1
+
+    def count_by_status(self, status: StepStatus) -> int:
+        """Retorna quantos resultados têm o status informado (O(1))"""
+        return self._status_counts[status]
+
     def get_successful_steps(self) -> List[str]:
         """Retorna lista de steps executados com sucesso"""
         return [r.step_name for r in self.results if r.status == StepStatus.SUCCESS]
-    
+
     def has_critical_errors(self) -> bool:
-        """Verifica se houve erros críticos"""
-        return any(r.status == StepStatus.CRITICAL_ERROR for r in self.results)
\ No newline at end of file
+        """Verifica se houve erros críticos (O(1) via contadores)"""
+        return self._status_counts[StepStatus.CRITICAL_ERROR] > 0
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Step Cache - Memoização de respostas de steps em janelas curtas de tempo.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class StepResponseCache:
+    """
+    Cache TTL limitado para respostas de steps.
+
+    Os steps de ML são funções determinísticas do contexto da requisição
+    dentro de janelas curtas, então fluxos repetidos (retries do cliente,
+    UPDATE_PROFILE duplicado) podem ser respondidos da memória em vez de
+    repetir as chamadas HTTP. Implementação própria sobre OrderedDict,
+    sem dependência externa: expiração preguiçosa no get e descarte das
+    entradas mais antigas quando o limite é atingido.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+        """
+        Args:
+            maxsize: Número máximo de entradas mantidas
+            ttl: Tempo de vida de cada entrada, em segundos
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(step_name: str,
+                 user_id: str,
+                 session_id: str,
+                 request_data: Dict[str, Any]) -> bytes:
+        """
+        Deriva a chave de cache a partir do step e do contexto.
+
+        O request_data é canonicalizado (chaves ordenadas) para que
+        requisições equivalentes produzam a mesma chave.
+        """
+        canonical = json.dumps(request_data, sort_keys=True, default=str)
+        return hashlib.blake2b(
+            f"{step_name}|{user_id}|{session_id}|{canonical}".encode(),
+            digest_size=16
+        ).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Retorna o valor da chave, ou None se ausente/expirado"""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: bytes, value: Any) -> None:
+        """Armazena o valor, descartando as entradas mais antigas se cheio"""
+        now = time.monotonic()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (now + self.ttl, value)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
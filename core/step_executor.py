@@ -1,35 +1,213 @@
 """
 Step Executor - Responsável por executar steps individuais.
 """
+import asyncio
+import logging
+import os
 import time
+from dataclasses import replace
 from typing import Dict, Any, Optional
-from datetime import datetime
 import traceback
 
 from config.settings import FlowStep, StepStatus
 from core.models import StepResult, ExecutionContext
-from core.flow_router import FlowRouter
-from utils.http_client import HttpClient, HttpResponse
+from core.step_cache import StepResponseCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.http_client import HttpClient, AsyncHttpClient, HttpResponse
 from utils.logger import get_logger
 
 
 logger = get_logger("step_executor")
 
 
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'X-Orchestrator': 'senai-ml-orchestrator'
+}
+
+
+def _default_payload(step: FlowStep, context: ExecutionContext) -> Dict[str, Any]:
+    """Payload base usado pela maioria dos steps"""
+    return {"user_id": context.user_id}
+
+
+def _embeddings_payload(step: FlowStep, context: ExecutionContext) -> Dict[str, Any]:
+    """Payload do create_embeddings (contrato distinto dos demais)"""
+    return {"sessionId": context.session_id}
+
+
+def _vacancy_payload(step: FlowStep, context: ExecutionContext) -> Dict[str, Any]:
+    """Payload base + parâmetros de vaga não nulos"""
+    request_data = context.request_data
+    payload = {"user_id": context.user_id}
+
+    for key in ("vacancy_id", "vacancy_name", "vacancy_description"):
+        value = request_data.get(key)
+        if value is not None:
+            payload[key] = value
+
+    return payload
+
+
+def _profession_payload(step: FlowStep, context: ExecutionContext) -> Dict[str, Any]:
+    """Payload base + parâmetros de profissão não nulos"""
+    request_data = context.request_data
+    payload = {"user_id": context.user_id}
+
+    for key in ("position_id", "career_name", "position_name"):
+        value = request_data.get(key)
+        if value is not None:
+            payload[key] = value
+
+    return payload
+
+
+# Despacho O(1) por nome de step (sem varreduras de substring por chamada).
+# Steps ausentes usam o payload padrão.
+_PAYLOAD_BUILDERS = {
+    'create_embeddings': _embeddings_payload,
+    'match_analysis_user_vacancy': _vacancy_payload,
+    'gap_analysis_user_vacancy': _vacancy_payload,
+    'suggest_course_vacancy': _vacancy_payload,
+    'match_usuario_carreira': _profession_payload,
+    'match_analysis_user_profession': _profession_payload,
+    'gap_analysis_user_profession': _profession_payload,
+    'suggest_course_profession': _profession_payload,
+}
+
+
+# Tokens genéricos tentados, em ordem, quando o token específico do step
+# não foi fornecido
+_VACANCY_TOKEN_KEYS = (
+    "match_candidato_token",
+    "match_analysis_user_vacancy_token",
+    "gap_analysis_user_vacancy_token",
+    "suggest_course_vacancy_token",
+)
+_PROFESSION_TOKEN_KEYS = (
+    "match_user_profession_token",
+    "match_user_career_token",
+    "match_analysis_user_profession_token",
+    "gap_analysis_user_profession_token",
+    "suggest_course_profession_token",
+)
+_TOKEN_FALLBACKS = {
+    'match_analysis_user_vacancy': _VACANCY_TOKEN_KEYS,
+    'gap_analysis_user_vacancy': _VACANCY_TOKEN_KEYS,
+    'suggest_course_vacancy': _VACANCY_TOKEN_KEYS,
+    'match_usuario_carreira': _PROFESSION_TOKEN_KEYS,
+    'match_analysis_user_profession': _PROFESSION_TOKEN_KEYS,
+    'gap_analysis_user_profession': _PROFESSION_TOKEN_KEYS,
+    'suggest_course_profession': _PROFESSION_TOKEN_KEYS,
+}
+
+
 class StepExecutor:
     """Executor de steps individuais"""
-    
+
     def __init__(self):
         """Inicializa o executor de steps"""
+        # Retry com backoff exponencial + jitter (implementado no cliente):
+        # só re-tenta 5xx/timeout/erro de conexão, nunca 4xx
+        retry_count = int(os.getenv("ORCH_STEP_RETRIES", "2"))
         self.http_client = HttpClient(
             default_timeout=120,
-            default_headers={
-                'Content-Type': 'application/json',
-                'X-Orchestrator': 'senai-ml-orchestrator'
-            }
+            default_headers=DEFAULT_HEADERS,
+            retry_count=retry_count,
+            retry_delay=0.5
         )
-        self.flow_router = FlowRouter()
+        self.async_http_client = AsyncHttpClient(
+            default_timeout=120,
+            default_headers=DEFAULT_HEADERS,
+            retry_count=retry_count,
+            retry_delay=0.5
+        )
+        # Memoização de respostas de steps idempotentes (janela curta).
+        # TTL e tamanho configuráveis por ambiente; TTL <= 0 desativa.
+        cache_ttl = float(os.getenv("ORCH_STEP_CACHE_TTL", "60"))
+        cache_size = int(os.getenv("ORCH_STEP_CACHE_SIZE", "10000"))
+        self.step_cache: Optional[StepResponseCache] = (
+            StepResponseCache(maxsize=cache_size, ttl=cache_ttl)
+            if cache_ttl > 0 else None
+        )
+
+        # Disjuntor por step: endpoints insistentemente fora do ar são
+        # cortados rápido, liberando o orçamento de concorrência para os
+        # serviços saudáveis
+        self._breaker_threshold = int(os.getenv("ORCH_BREAKER_THRESHOLD", "5"))
+        self._breaker_reset = float(os.getenv("ORCH_BREAKER_RESET", "30"))
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+        # Limite de requisições simultâneas aos serviços downstream:
+        # paralelismo demais degrada o p99 dos serviços de ML. O handler
+        # é singleton, então o semáforo vale para o processo inteiro —
+        # picos de carga não amplificam em thundering herd de retries.
+        # DOWNSTREAM_CONCURRENCY é aceito como alias do mesmo knob
+        # (documentado nos templates em deployments/ e .env.example).
+        self.max_concurrency = int(
+            os.getenv("ORCH_MAX_CONCURRENCY")
+            or os.getenv("DOWNSTREAM_CONCURRENCY")
+            or "6"
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
         self.logger = logger
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Retorna o semáforo de concorrência, recriando-o se o loop mudou"""
+        loop = asyncio.get_running_loop()
+
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+
+        return self._semaphore
+
+    def _get_breaker(self, step_name: str) -> CircuitBreaker:
+        """Retorna o disjuntor do step, criando-o na primeira falha/uso"""
+        breaker = self._breakers.get(step_name)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                step_name,
+                CircuitBreaker(
+                    failure_threshold=self._breaker_threshold,
+                    reset_timeout=self._breaker_reset
+                )
+            )
+        return breaker
+
+    def _breaker_short_circuit(self,
+                              step: FlowStep,
+                              context: ExecutionContext,
+                              started_at: int) -> Optional[StepResult]:
+        """Retorna um StepResult SKIPPED se o circuito do step está aberto"""
+        if self._get_breaker(step.name).allow():
+            return None
+
+        self.logger.warning(
+            "step_circuit_open",
+            execution_id=context.execution_id,
+            step_name=step.name
+        )
+
+        completed_at = time.time_ns()
+        return StepResult(
+            step_name=step.name,
+            status=StepStatus.SKIPPED,
+            duration=(completed_at - started_at) / 1e9,
+            started_at=started_at,
+            completed_at=completed_at,
+            error="circuit_open"
+        )
+
+    def _record_breaker_outcome(self, step: FlowStep, response: HttpResponse) -> None:
+        """Alimenta o disjuntor: 5xx/timeout/conexão contam como falha"""
+        breaker = self._get_breaker(step.name)
+        if response.status_code == 0 or response.is_server_error:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
     
     def execute_step(self, 
                     step: FlowStep, 
@@ -44,8 +222,7 @@ class StepExecutor:
         Returns:
             Resultado da execução
         """
-        start_time = time.time()
-        started_at = datetime.utcnow()
+        started_at = time.time_ns()
         
         self.logger.info(
             "step_execution_start",
@@ -55,48 +232,25 @@ class StepExecutor:
         )
         
         try:
-            # Verifica se o step deve ser pulado
-            should_skip, skip_reason = self.flow_router.should_skip_step(step, context.request_data)
-            if should_skip:
-                self.logger.info(
-                    "step_skipped",
-                    execution_id=context.execution_id,
-                    step_name=step.name,
-                    reason=skip_reason
-                )
-                
-                return StepResult(
-                    step_name=step.name,
-                    status=StepStatus.SKIPPED,
-                    duration=time.time() - start_time,
-                    started_at=started_at,
-                    completed_at=datetime.utcnow(),
-                    error=f"Skipped: {skip_reason}"
-                )
-            
-            # Obtém URL do step
-            url = step.get_url()
-            if not url:
-                self.logger.warning(
-                    "step_url_not_configured",
-                    execution_id=context.execution_id,
-                    step_name=step.name,
-                    env_var=step.url_env_var
-                )
-                
-                return StepResult(
-                    step_name=step.name,
-                    status=StepStatus.SKIPPED,
-                    duration=time.time() - start_time,
-                    started_at=started_at,
-                    completed_at=datetime.utcnow(),
-                    error=f"URL not configured: {step.url_env_var}"
-                )
-            
+            # Verificações que podem encerrar o step antes da requisição
+            short_circuit, url = self._pre_execute(step, context, started_at)
+            if short_circuit:
+                return short_circuit
+
+            # Resposta memoizada recente para o mesmo contexto?
+            cache_key, cached = self._check_cache(step, context, started_at)
+            if cached is not None:
+                return cached
+
+            # Circuito aberto? Falha rápido em vez de gastar um timeout
+            tripped = self._breaker_short_circuit(step, context, started_at)
+            if tripped is not None:
+                return tripped
+
             # Prepara payload e headers
             payload = self._prepare_payload(step, context)
             headers = self._prepare_headers(step, context)
-            
+
             # Log do payload (sem dados sensíveis)
             self.logger.debug(
                 "step_request_prepared",
@@ -106,7 +260,7 @@ class StepExecutor:
                 payload_keys=list(payload.keys()),
                 has_auth=bool(headers.get('Authorization'))
             )
-            
+
             # Faz a requisição HTTP
             with self.logger.step_context(context.execution_id, step.name):
                 response = self.http_client.post(
@@ -115,66 +269,332 @@ class StepExecutor:
                     headers=headers,
                     timeout=step.timeout
                 )
-            
-            duration = time.time() - start_time
-            
-            # Processa resposta
-            if response.is_success:
-                status = StepStatus.SUCCESS
-                error = None
-            else:
-                status = StepStatus.FAILED
-                error = response.error or f"HTTP {response.status_code}"
-            
-            result = StepResult(
+
+            self._record_breaker_outcome(step, response)
+
+            result = self._build_result(step, context, response, url, started_at)
+            self._store_in_cache(cache_key, result)
+            return result
+
+        except Exception as e:
+            self._get_breaker(step.name).record_failure()
+            return self._exception_result(step, context, e, started_at)
+
+    async def execute_step_async(self,
+                                step: FlowStep,
+                                context: ExecutionContext) -> StepResult:
+        """
+        Executa um step individual de forma assíncrona.
+
+        Usa o cliente aiohttp compartilhado, permitindo que múltiplos steps
+        aguardem I/O no mesmo event loop sem threads dedicadas.
+
+        Args:
+            step: Step a executar
+            context: Contexto de execução
+
+        Returns:
+            Resultado da execução
+        """
+        started_at = time.time_ns()
+
+        self.logger.info(
+            "step_execution_start",
+            execution_id=context.execution_id,
+            step_name=step.name,
+            user_id=context.user_id
+        )
+
+        try:
+            # Verificações que podem encerrar o step antes da requisição
+            short_circuit, url = self._pre_execute(step, context, started_at)
+            if short_circuit:
+                return short_circuit
+
+            # Resposta memoizada recente para o mesmo contexto?
+            cache_key, cached = self._check_cache(step, context, started_at)
+            if cached is not None:
+                return cached
+
+            # Circuito aberto? Falha rápido em vez de gastar um timeout
+            tripped = self._breaker_short_circuit(step, context, started_at)
+            if tripped is not None:
+                return tripped
+
+            # Prepara payload e headers
+            payload = self._prepare_payload(step, context)
+            headers = self._prepare_headers(step, context)
+
+            # Log do payload (sem dados sensíveis)
+            self.logger.debug(
+                "step_request_prepared",
+                execution_id=context.execution_id,
                 step_name=step.name,
-                status=status,
-                duration=duration,
-                started_at=started_at,
-                completed_at=datetime.utcnow(),
-                response=response.body,
-                error=error,
                 url=url,
-                status_code=response.status_code
+                payload_keys=list(payload.keys()),
+                has_auth=bool(headers.get('Authorization'))
             )
-            
-            self.logger.info(
-                "step_execution_end",
+
+            # Faz a requisição HTTP sem bloquear o event loop, limitando
+            # a concorrência de saída via semáforo
+            async with self._get_semaphore():
+                response = await self.async_http_client.post(
+                    url=url,
+                    json_payload=payload,
+                    headers=headers,
+                    timeout=step.timeout
+                )
+
+            self._record_breaker_outcome(step, response)
+
+            result = self._build_result(step, context, response, url, started_at)
+            self._store_in_cache(cache_key, result)
+            return result
+
+        except Exception as e:
+            self._get_breaker(step.name).record_failure()
+            return self._exception_result(step, context, e, started_at)
+
+    async def execute_batch_async(self,
+                                 steps: list[FlowStep],
+                                 context: ExecutionContext) -> list[StepResult]:
+        """
+        Executa steps irmãos do mesmo batch_group em um único POST.
+
+        O serviço recebe {"items": [payload_0, payload_1, ...]} e responde
+        com uma lista na mesma ordem; cada item vira o response do
+        StepResult correspondente. Uma viagem de rede substitui N
+        requisições ao mesmo serviço.
+
+        Args:
+            steps: Steps do mesmo batch_group (mesmo serviço de destino)
+            context: Contexto de execução
+
+        Returns:
+            Lista de resultados, na mesma ordem dos steps
+        """
+        started_at = time.time_ns()
+        first = steps[0]
+
+        self.logger.info(
+            "batch_execution_start",
+            execution_id=context.execution_id,
+            batch_group=first.batch_group,
+            step_names=[s.name for s in steps]
+        )
+
+        # Steps do mesmo grupo apontam para o mesmo serviço; a URL do
+        # primeiro vale para todos
+        url = first.get_url()
+        if not url:
+            self.logger.warning(
+                "step_url_not_configured",
                 execution_id=context.execution_id,
-                step_name=step.name,
-                status=status,
-                duration=duration,
-                status_code=response.status_code
+                step_name=first.name,
+                env_var=first.url_env_var
             )
-            
-            return result
-            
+            completed_at = time.time_ns()
+            return [
+                StepResult(
+                    step_name=step.name,
+                    status=StepStatus.SKIPPED,
+                    duration=(completed_at - started_at) / 1e9,
+                    started_at=started_at,
+                    completed_at=completed_at,
+                    error=f"URL not configured: {first.url_env_var}"
+                )
+                for step in steps
+            ]
+
+        try:
+            payloads = [self._prepare_payload(step, context) for step in steps]
+            headers = self._prepare_headers(first, context)
+
+            async with self._get_semaphore():
+                response = await self.async_http_client.post(
+                    url=url,
+                    json_payload={"items": payloads},
+                    headers=headers,
+                    timeout=max(step.timeout for step in steps)
+                )
+
+            # Resposta em lote: lista na mesma ordem dos itens enviados.
+            # Se o corpo não for uma lista, cada step recebe o corpo inteiro
+            items = response.body if isinstance(response.body, list) else None
+
+            results = []
+            for index, step in enumerate(steps):
+                if items is not None and index < len(items):
+                    item_response = replace(response, body=items[index])
+                else:
+                    item_response = response
+                results.append(
+                    self._build_result(step, context, item_response, url, started_at)
+                )
+
+            return results
+
         except Exception as e:
-            # Captura exceções não tratadas
-            duration = time.time() - start_time
-            error_msg = str(e)
-            error_details = traceback.format_exc()
-            
-            self.logger.error(
-                "step_execution_exception",
+            return [
+                self._exception_result(step, context, e, started_at)
+                for step in steps
+            ]
+
+    def _check_cache(self,
+                    step: FlowStep,
+                    context: ExecutionContext,
+                    started_at: int) -> tuple[Optional[bytes], Optional[StepResult]]:
+        """
+        Consulta a memoização de respostas para steps cacheáveis.
+
+        Returns:
+            Tupla (chave de cache ou None, StepResult memoizado ou None)
+        """
+        if self.step_cache is None or not step.cacheable:
+            return None, None
+
+        cache_key = StepResponseCache.make_key(
+            step.name, context.user_id, context.session_id, context.request_data
+        )
+
+        cached = self.step_cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+
+        self.logger.info(
+            "step_cache_hit",
+            execution_id=context.execution_id,
+            step_name=step.name
+        )
+
+        # Reaproveita a resposta, mas com os timestamps desta execução
+        completed_at = time.time_ns()
+        return cache_key, replace(
+            cached,
+            duration=(completed_at - started_at) / 1e9,
+            started_at=started_at,
+            completed_at=completed_at
+        )
+
+    def _store_in_cache(self,
+                       cache_key: Optional[bytes],
+                       result: StepResult) -> None:
+        """Memoiza o resultado se o step é cacheável e a execução teve sucesso"""
+        if cache_key is not None and result.status == StepStatus.SUCCESS:
+            self.step_cache.set(cache_key, result)  # cache ativo se há chave
+
+    def _pre_execute(self,
+                    step: FlowStep,
+                    context: ExecutionContext,
+                    started_at: int) -> tuple[Optional[StepResult], Optional[str]]:
+        """
+        Executa as verificações prévias de um step (URL configurada).
+
+        As regras de skip por contexto já foram aplicadas pelo FlowRouter
+        no roteamento, então steps pulados nem chegam aqui.
+
+        Returns:
+            Tupla (resultado de curto-circuito ou None, url do step)
+        """
+        # Obtém URL do step
+        url = step.get_url()
+        if not url:
+            self.logger.warning(
+                "step_url_not_configured",
                 execution_id=context.execution_id,
                 step_name=step.name,
-                error=error_msg,
-                traceback=error_details,
-                duration=duration
+                env_var=step.url_env_var
             )
-            
+
             return StepResult(
                 step_name=step.name,
-                status=StepStatus.CRITICAL_ERROR,
-                duration=duration,
+                status=StepStatus.SKIPPED,
+                duration=(time.time_ns() - started_at) / 1e9,
                 started_at=started_at,
-                completed_at=datetime.utcnow(),
-                error=error_msg,
-                error_details=error_details
-            )
-    
-    def _prepare_payload(self, 
+                completed_at=time.time_ns(),
+                error=f"URL not configured: {step.url_env_var}"
+            ), None
+
+        return None, url
+
+    def _build_result(self,
+                     step: FlowStep,
+                     context: ExecutionContext,
+                     response: HttpResponse,
+                     url: str,
+                     started_at: int) -> StepResult:
+        """Constrói o StepResult a partir da resposta HTTP"""
+        duration = (time.time_ns() - started_at) / 1e9
+
+        # Processa resposta
+        if response.is_success:
+            status = StepStatus.SUCCESS
+            error = None
+        else:
+            status = StepStatus.FAILED
+            error = response.error or f"HTTP {response.status_code}"
+
+        result = StepResult(
+            step_name=step.name,
+            status=status,
+            duration=duration,
+            started_at=started_at,
+            completed_at=time.time_ns(),
+            response=response.body,
+            error=error,
+            url=url,
+            status_code=response.status_code
+        )
+
+        self.logger.info(
+            "step_execution_end",
+            execution_id=context.execution_id,
+            step_name=step.name,
+            status=status.label,
+            duration=duration,
+            status_code=response.status_code
+        )
+
+        return result
+
+    def _exception_result(self,
+                         step: FlowStep,
+                         context: ExecutionContext,
+                         exception: Exception,
+                         started_at: int) -> StepResult:
+        """Constrói o StepResult para exceções não tratadas"""
+        duration = (time.time_ns() - started_at) / 1e9
+        error_msg = str(exception)
+
+        # format_exc percorre e formata a pilha inteira (centenas de µs);
+        # sob uma tempestade de falhas isso domina o caminho de erro, então
+        # só é computado quando o logger está em DEBUG
+        error_details = (
+            traceback.format_exc()
+            if self.logger.isEnabledFor(logging.DEBUG)
+            else None
+        )
+
+        self.logger.error(
+            "step_execution_exception",
+            execution_id=context.execution_id,
+            step_name=step.name,
+            error=error_msg,
+            traceback=error_details,
+            duration=duration
+        )
+
+        return StepResult(
+            step_name=step.name,
+            status=StepStatus.CRITICAL_ERROR,
+            duration=duration,
+            started_at=started_at,
+            completed_at=time.time_ns(),
+            error=error_msg,
+            error_details=error_details
+        )
+
+    def _prepare_payload(self,
                         step: FlowStep, 
                         context: ExecutionContext) -> Dict[str, Any]:
         """
@@ -187,41 +607,15 @@ class StepExecutor:
         Returns:
             Payload preparado
         """
-        request_data = context.request_data
-        
-        # Payload base para maioria dos steps
-        payload = {"user_id": context.user_id}
-        
-        # Payload especial para create_embeddings
-        if step.name == "create_embeddings":
-            return {"sessionId": context.session_id}
-        
-        # Adiciona parâmetros específicos de vaga
-        if "vacancy" in step.name:
-            vacancy_params = {
-                "vacancy_id": request_data.get("vacancy_id"),
-                "vacancy_name": request_data.get("vacancy_name"),
-                "vacancy_description": request_data.get("vacancy_description")
-            }
-            # Adiciona apenas parâmetros não nulos
-            payload.update({k: v for k, v in vacancy_params.items() if v is not None})
-        
-        # Adiciona parâmetros específicos de profissão
-        if "profession" in step.name or "carreira" in step.name:
-            profession_params = {
-                "position_id": request_data.get("position_id"),
-                "career_name": request_data.get("career_name"),
-                "position_name": request_data.get("position_name")
-            }
-            # Adiciona apenas parâmetros não nulos
-            payload.update({k: v for k, v in profession_params.items() if v is not None})
-        
+        # Despacho O(1) pela tabela de builders
+        payload = _PAYLOAD_BUILDERS.get(step.name, _default_payload)(step, context)
+
         self.logger.debug(
             "payload_prepared",
             step_name=step.name,
             payload_keys=list(payload.keys())
         )
-        
+
         return payload
     
     def _prepare_headers(self, 
@@ -245,24 +639,13 @@ class StepExecutor:
         token_key = f"{step.name}_token"
         token = context.request_data.get(token_key)
         
-        # Se não encontrou token específico, tenta tokens genéricos
+        # Se não encontrou token específico, tenta os genéricos da tabela
         if not token:
-            if "vacancy" in step.name:
-                # Tenta tokens de vaga genéricos
-                for key in ["match_candidato_token", "match_analysis_user_vacancy_token", 
-                           "gap_analysis_user_vacancy_token", "suggest_course_vacancy_token"]:
-                    if key in context.request_data:
-                        token = context.request_data.get(key)
-                        break
-            elif "profession" in step.name or "carreira" in step.name:
-                # Tenta tokens de profissão genéricos
-                for key in ["match_user_profession_token", "match_user_career_token",
-                           "match_analysis_user_profession_token", "gap_analysis_user_profession_token",
-                           "suggest_course_profession_token"]:
-                    if key in context.request_data:
-                        token = context.request_data.get(key)
-                        break
-        
+            for key in _TOKEN_FALLBACKS.get(step.name, ()):
+                if key in context.request_data:
+                    token = context.request_data.get(key)
+                    break
+
         if token:
             headers['Authorization'] = f'Bearer {token}'
             self.logger.debug(
@@ -274,5 +657,10 @@ class StepExecutor:
         return headers
     
     def close(self):
-        """Fecha recursos do executor"""
-        self.http_client.close()
\ No newline at end of file
+        """Fecha recursos síncronos do executor"""
+        self.http_client.close()
+
+    async def aclose(self):
+        """Fecha todos os recursos do executor, incluindo a sessão assíncrona"""
+        self.http_client.close()
+        await self.async_http_client.close()
\ No newline at end of file
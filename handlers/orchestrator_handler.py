@@ -1,22 +1,94 @@
 """
 Orchestrator Handler - Handler principal para requisições de orquestração.
 """
+import asyncio
+import os
 import uuid
 import time
 from typing import Dict, Any, Tuple, Optional
-from datetime import datetime
+
+import orjson
+
+from pydantic import BaseModel, ConfigDict, Field, StrictBool, StrictStr, ValidationError
 
 from core.flow_router import FlowRouter
 from core.flow_executor import FlowExecutor
-from core.models import ExecutionContext, StepResult
+from core.models import ExecutionContext, StepResult, ns_to_iso
 from config.settings import StepStatus
+from utils.dedup import InMemoryDedupBackend, RedisDedupBackend
 from utils.logger import get_logger
-from utils.http_client import HttpClient
+from utils.http_client import AsyncHttpClient
 
 
 logger = get_logger("orchestrator_handler")
 
 
+# Conjuntos de campos como constantes de módulo (alocados uma vez no
+# import, não por requisição); a validação em si é feita pelo schema
+# pré-compilado abaixo — aqui eles só classificam mensagens de erro
+_REQUIRED_FIELDS = frozenset(("user_id", "session_id"))
+
+_BOOLEAN_FIELDS = frozenset((
+    "create_user_embedding",
+    "process_profession_orchestrator",
+    "process_vacancy_orchestrator",
+    "process_only_profession_course",
+    "process_only_profession_skills",
+    "process_only_vacancy_course",
+    "process_only_vacancy_skills",
+))
+
+
+class _RequestSchema(BaseModel):
+    """
+    Schema da requisição com validadores compilados uma única vez no
+    import (pydantic-core), substituindo os laços de isinstance por campo
+    a cada requisição. Tipos estritos preservam a semântica original:
+    nada de coerção de "true"/1 para bool.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    user_id: StrictStr = Field(min_length=1)
+    session_id: StrictStr = Field(min_length=1)
+
+    # Flags booleanas (opcionais; o default não passa pelo validador)
+    create_user_embedding: StrictBool = None
+    process_profession_orchestrator: StrictBool = None
+    process_vacancy_orchestrator: StrictBool = None
+    process_only_profession_course: StrictBool = None
+    process_only_profession_skills: StrictBool = None
+    process_only_vacancy_course: StrictBool = None
+    process_only_vacancy_skills: StrictBool = None
+
+    # Tokens de autorização (se fornecidos, devem ser strings)
+    create_user_embeddings_token: Optional[StrictStr] = None
+    match_candidato_token: Optional[StrictStr] = None
+    match_analysis_user_vacancy_token: Optional[StrictStr] = None
+    gap_analysis_user_vacancy_token: Optional[StrictStr] = None
+    suggest_course_vacancy_token: Optional[StrictStr] = None
+    match_user_profession_token: Optional[StrictStr] = None
+    match_user_career_token: Optional[StrictStr] = None
+    match_analysis_user_profession_token: Optional[StrictStr] = None
+    gap_analysis_user_profession_token: Optional[StrictStr] = None
+    suggest_course_profession_token: Optional[StrictStr] = None
+
+
+def _legacy_error(error: Dict[str, Any]) -> str:
+    """Converte um erro do pydantic para o formato histórico da API"""
+    field = str(error["loc"][0]) if error["loc"] else "request"
+
+    if field in _REQUIRED_FIELDS:
+        # Ausente ou vazio conta como faltando; tipo errado é erro de tipo
+        if error["type"] == "missing" or not error.get("input"):
+            return f"Missing required field: {field}"
+        return f"Field '{field}' must be a string"
+
+    if field in _BOOLEAN_FIELDS:
+        return f"Field '{field}' must be a boolean"
+
+    return f"Field '{field}' must be a string if provided"
+
+
 class OrchestratorHandler:
     """Handler principal para gerenciar requisições de orquestração"""
     
@@ -26,20 +98,37 @@ class OrchestratorHandler:
         self.flow_executor = FlowExecutor()
         self.logger = logger
         
-        # Cliente HTTP para webhook final (se configurado)
-        self.webhook_client = HttpClient(default_timeout=15)
+        # Cliente HTTP para webhook final (se configurado); a URL vem do
+        # ambiente, que no Cloud Run é imutável durante a vida do processo
+        self.webhook_client = AsyncHttpClient(default_timeout=15)
+        self._webhook_url = os.getenv("DEFAULT_WEBHOOK_URL")
+
+        # Webhooks em voo (disparados sem bloquear a resposta); a
+        # referência forte evita que o GC cancele as tasks no meio
+        self._pending_webhooks: set = set()
         
-        # Tracking de requisições para evitar duplicatas
-        self.execution_tracker = {}
+        # Backend de deduplicação: Redis quando configurado (dedup entre
+        # workers), senão em memória (seguro para acessos concorrentes no
+        # mesmo event loop)
         self.execution_tracker_ttl = 300  # 5 minutos
+        dedup_redis_url = os.getenv("DEDUP_REDIS_URL")
+        if dedup_redis_url:
+            self.dedup_backend = RedisDedupBackend.from_url(
+                dedup_redis_url, ttl=self.execution_tracker_ttl
+            )
+        else:
+            self.dedup_backend = InMemoryDedupBackend(ttl=self.execution_tracker_ttl)
     
-    def handle_request(self, request_data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    async def handle_request(self, request_data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
         """
         Handler principal para requisições de orquestração.
-        
+
+        Assíncrono de ponta a ponta: os steps aguardam I/O no event loop
+        do servidor, sem threads dedicadas por requisição.
+
         Args:
             request_data: Dados da requisição
-            
+
         Returns:
             Tupla (response_dict, status_code)
         """
@@ -68,7 +157,7 @@ class OrchestratorHandler:
             session_id = request_data["session_id"]
             
             # Verifica duplicatas
-            if self._is_duplicate_request(user_id, session_id, request_data):
+            if await self._is_duplicate_request(user_id, session_id, request_data):
                 self.logger.warning(
                     "duplicate_request_detected",
                     execution_id=execution_id,
@@ -76,21 +165,18 @@ class OrchestratorHandler:
                     session_id=session_id
                 )
             
-            # Determina qual fluxo executar
-            flow_name = self.flow_router.determine_flow(request_data)
-            flow_definition = self.flow_router.get_flow_definition(flow_name)
-            
+            # Determina qual fluxo executar, os steps filtrados e os
+            # pulados por contexto (tudo resolvido de uma vez, memoizado)
+            flow_name, steps, skipped_steps = self.flow_router.route(request_data)
+
             # Valida parâmetros do fluxo
             flow_errors = self.flow_router.validate_flow_params(flow_name, request_data)
             if flow_errors:
                 return {"errors": flow_errors, "flow": flow_name}, 400
-            
+
             self.logger.log_execution_start(execution_id, flow_name, user_id)
-            
-            # Filtra steps baseado no contexto
-            steps = self.flow_router.filter_steps_by_context(flow_definition, request_data)
-            
-            if not steps:
+
+            if not steps and not skipped_steps:
                 self.logger.warning(
                     "no_steps_to_execute",
                     execution_id=execution_id,
@@ -110,25 +196,48 @@ class OrchestratorHandler:
                 flow_name=flow_name,
                 request_data=request_data
             )
-            
+
+            # Registra os steps pulados pelo pré-filtro, preservando o
+            # formato da resposta (um StepResult SKIPPED por step pulado)
+            for step_name, skip_reason in skipped_steps:
+                self.logger.info(
+                    "step_skipped",
+                    execution_id=execution_id,
+                    step_name=step_name,
+                    reason=skip_reason
+                )
+                skip_ns = time.time_ns()
+                context.add_result(StepResult(
+                    step_name=step_name,
+                    status=StepStatus.SKIPPED,
+                    duration=0.0,
+                    started_at=skip_ns,
+                    completed_at=skip_ns,
+                    error=f"Skipped: {skip_reason}"
+                ))
+
             # Executa o fluxo
-            results = self.flow_executor.execute_flow(steps, context)
-            
+            await self.flow_executor.execute_flow_async(steps, context)
+            results = list(context.results)
+
             # Monta resposta
             duration = time.time() - start_time
             response = self._build_response(context, results, duration)
+
+            # Dispara o webhook sem bloquear a resposta ao cliente: a
+            # entrega acontece em background e é aguardada no shutdown
+            self._dispatch_webhook(response)
             
-            # Executa webhook se configurado
-            self._execute_webhook(response)
-            
-            # Log de finalização
+            # Log de finalização (reusa os contadores do summary em vez
+            # de varrer os resultados de novo)
+            summary = response["summary"]
             self.logger.log_execution_end(
                 execution_id=execution_id,
                 flow_name=flow_name,
                 duration=duration,
                 status="completed",
-                total_steps=len(results),
-                successful_steps=len([r for r in results if r.status == StepStatus.SUCCESS])
+                total_steps=summary["total_steps"],
+                successful_steps=summary["successful"]
             )
             
             return response, 200
@@ -151,111 +260,182 @@ class OrchestratorHandler:
                 "duration": duration
             }, 500
     
+    async def handle_request_stream(self, request_data: Dict[str, Any]):
+        """
+        Versão em streaming de handle_request: produz linhas NDJSON.
+
+        Emite um evento "start", um evento "step" por step conforme cada
+        onda completa (via execute_flow_iter) e um "summary" final com a
+        resposta consolidada. O primeiro byte chega com o step mais
+        rápido em vez de esperar o fluxo inteiro.
+
+        Args:
+            request_data: Dados da requisição
+
+        Yields:
+            Linhas NDJSON (bytes terminados em \\n)
+        """
+        execution_id = str(uuid.uuid4())
+        start_time = time.time()
+
+        self.logger.info(
+            "request_received",
+            execution_id=execution_id,
+            request_keys=list(request_data.keys()),
+            streaming=True
+        )
+
+        try:
+            validation_errors = self._validate_request(request_data)
+            if validation_errors:
+                self.logger.warning(
+                    "request_validation_failed",
+                    execution_id=execution_id,
+                    errors=validation_errors
+                )
+                yield orjson.dumps({"event": "error", "errors": validation_errors}) + b"\n"
+                return
+
+            user_id = request_data["user_id"]
+            session_id = request_data["session_id"]
+
+            if await self._is_duplicate_request(user_id, session_id, request_data):
+                self.logger.warning(
+                    "duplicate_request_detected",
+                    execution_id=execution_id,
+                    user_id=user_id,
+                    session_id=session_id
+                )
+
+            flow_name, steps, skipped_steps = self.flow_router.route(request_data)
+
+            flow_errors = self.flow_router.validate_flow_params(flow_name, request_data)
+            if flow_errors:
+                yield orjson.dumps({
+                    "event": "error", "errors": flow_errors, "flow": flow_name
+                }) + b"\n"
+                return
+
+            self.logger.log_execution_start(execution_id, flow_name, user_id)
+
+            context = ExecutionContext(
+                execution_id=execution_id,
+                user_id=user_id,
+                session_id=session_id,
+                flow_name=flow_name,
+                request_data=request_data
+            )
+
+            yield orjson.dumps({
+                "event": "start",
+                "execution_id": execution_id,
+                "flow_name": flow_name,
+                "total_steps": len(steps) + len(skipped_steps)
+            }) + b"\n"
+
+            # Steps pulados pelo pré-filtro saem primeiro, como no
+            # caminho não-streaming
+            for step_name, skip_reason in skipped_steps:
+                self.logger.info(
+                    "step_skipped",
+                    execution_id=execution_id,
+                    step_name=step_name,
+                    reason=skip_reason
+                )
+                skip_ns = time.time_ns()
+                result = StepResult(
+                    step_name=step_name,
+                    status=StepStatus.SKIPPED,
+                    duration=0.0,
+                    started_at=skip_ns,
+                    completed_at=skip_ns,
+                    error=f"Skipped: {skip_reason}"
+                )
+                context.add_result(result)
+                yield orjson.dumps({"event": "step", **result.to_dict()}) + b"\n"
+
+            # Cada resultado é transmitido assim que sua onda completa
+            async for result in self.flow_executor.execute_flow_iter(steps, context):
+                yield orjson.dumps({"event": "step", **result.to_dict()}) + b"\n"
+
+            duration = time.time() - start_time
+            response = self._build_response(context, list(context.results), duration)
+
+            self._dispatch_webhook(response)
+
+            summary = response["summary"]
+            self.logger.log_execution_end(
+                execution_id=execution_id,
+                flow_name=flow_name,
+                duration=duration,
+                status="completed",
+                total_steps=summary["total_steps"],
+                successful_steps=summary["successful"]
+            )
+
+            yield orjson.dumps({"event": "summary", **response}) + b"\n"
+
+        except Exception as e:
+            duration = time.time() - start_time
+            self.logger.error(
+                "handler_exception",
+                execution_id=execution_id,
+                error=str(e),
+                error_type=type(e).__name__,
+                duration=duration
+            )
+            yield orjson.dumps({
+                "event": "error",
+                "execution_id": execution_id,
+                "error": "Internal server error",
+                "message": str(e),
+                "duration": duration
+            }) + b"\n"
+
     def _validate_request(self, request_data: Dict[str, Any]) -> list[str]:
         """
         Valida dados básicos da requisição.
-        
+
+        Uma única chamada ao schema pré-compilado (_RequestSchema) cobre
+        campos obrigatórios, flags booleanas e tokens; os erros são
+        traduzidos para as mensagens históricas da API.
+
         Args:
             request_data: Dados da requisição
-            
+
         Returns:
             Lista de erros de validação
         """
-        errors = []
-        
-        # Campos obrigatórios
-        if not request_data.get("user_id"):
-            errors.append("Missing required field: user_id")
-        elif not isinstance(request_data["user_id"], str):
-            errors.append("Field 'user_id' must be a string")
-        
-        if not request_data.get("session_id"):
-            errors.append("Missing required field: session_id")
-        elif not isinstance(request_data["session_id"], str):
-            errors.append("Field 'session_id' must be a string")
-        
-        # Validação de tipos para flags booleanas
-        boolean_fields = [
-            "create_user_embedding",
-            "process_profession_orchestrator",
-            "process_vacancy_orchestrator",
-            "process_only_profession_course",
-            "process_only_profession_skills",
-            "process_only_vacancy_course",
-            "process_only_vacancy_skills"
-        ]
-        
-        for field in boolean_fields:
-            if field in request_data and not isinstance(request_data[field], bool):
-                errors.append(f"Field '{field}' must be a boolean")
-        
-        # Validação de tokens (se fornecidos, devem ser strings)
-        token_fields = [
-            "create_user_embeddings_token",
-            "match_candidato_token",
-            "match_analysis_user_vacancy_token",
-            "gap_analysis_user_vacancy_token",
-            "suggest_course_vacancy_token",
-            "match_user_profession_token",
-            "match_user_career_token",
-            "match_analysis_user_profession_token",
-            "gap_analysis_user_profession_token",
-            "suggest_course_profession_token"
-        ]
-        
-        for field in token_fields:
-            if field in request_data and request_data[field] is not None:
-                if not isinstance(request_data[field], str):
-                    errors.append(f"Field '{field}' must be a string if provided")
-        
-        return errors
+        try:
+            _RequestSchema.model_validate(request_data)
+        except ValidationError as exc:
+            return [_legacy_error(error) for error in exc.errors()]
+
+        return []
     
-    def _is_duplicate_request(self, 
-                            user_id: str, 
-                            session_id: str, 
-                            request_data: Dict[str, Any]) -> bool:
+    async def _is_duplicate_request(self,
+                                   user_id: str,
+                                   session_id: str,
+                                   request_data: Dict[str, Any]) -> bool:
         """
         Verifica se é uma requisição duplicada recente.
-        
+
+        A consulta e o registro são atômicos no backend, então duas
+        requisições concorrentes com a mesma chave nunca passam ambas.
+
         Args:
             user_id: ID do usuário
             session_id: ID da sessão
             request_data: Dados da requisição
-            
+
         Returns:
             True se for duplicata
         """
         # Cria chave única para a requisição
         identifier = request_data.get("identifier", "")
         request_key = f"{user_id}_{session_id}_{identifier}"
-        
-        current_time = time.time()
-        
-        # Limpa entradas antigas
-        self._cleanup_execution_tracker()
-        
-        # Verifica se já foi processada recentemente
-        if request_key in self.execution_tracker:
-            last_execution = self.execution_tracker[request_key]
-            time_diff = current_time - last_execution
-            
-            if time_diff < self.execution_tracker_ttl:
-                return True
-        
-        # Registra nova execução
-        self.execution_tracker[request_key] = current_time
-        return False
-    
-    def _cleanup_execution_tracker(self):
-        """Remove entradas antigas do tracker de execução"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, timestamp in self.execution_tracker.items()
-            if current_time - timestamp > self.execution_tracker_ttl
-        ]
-        
-        for key in expired_keys:
-            del self.execution_tracker[key]
+
+        return await self.dedup_backend.seen_recently(request_key)
     
     def _build_response(self, 
                        context: ExecutionContext, 
@@ -279,7 +459,7 @@ class OrchestratorHandler:
             "user_id": context.user_id,
             "session_id": context.session_id,
             "duration": duration,
-            "timestamp": datetime.utcnow().isoformat() + "Z"
+            "timestamp": ns_to_iso(time.time_ns())
         }
         
         # Adiciona campos opcionais se presentes
@@ -289,59 +469,76 @@ class OrchestratorHandler:
             if field in context.request_data and context.request_data[field]:
                 response[field] = context.request_data[field]
         
-        # Resumo dos resultados
+        # Resumo via contadores incrementais do contexto (O(1) cada) e
+        # detalhes em uma única passada sobre os resultados
         response["summary"] = {
             "total_steps": len(results),
-            "successful": len([r for r in results if r.status == StepStatus.SUCCESS]),
-            "failed": len([r for r in results if r.status == StepStatus.FAILED]),
-            "skipped": len([r for r in results if r.status == StepStatus.SKIPPED]),
-            "critical_errors": len([r for r in results if r.status == StepStatus.CRITICAL_ERROR])
+            "successful": context.count_by_status(StepStatus.SUCCESS),
+            "failed": context.count_by_status(StepStatus.FAILED),
+            "skipped": context.count_by_status(StepStatus.SKIPPED),
+            "critical_errors": context.count_by_status(StepStatus.CRITICAL_ERROR)
         }
-        
-        # Detalhes dos steps
+
         response["steps"] = [
             {
                 "step_name": r.step_name,
-                "status": r.status,
+                "status": r.status.label,
                 "duration": r.duration,
-                "started_at": r.started_at.isoformat() + "Z",
-                "completed_at": r.completed_at.isoformat() + "Z",
+                "started_at": ns_to_iso(r.started_at),
+                "completed_at": ns_to_iso(r.completed_at),
                 "error": r.error,
                 "status_code": r.status_code
             }
             for r in results
         ]
-        
+
         # Adiciona flag de erro se houve falhas críticas
-        if any(r.status == StepStatus.CRITICAL_ERROR for r in results):
+        if context.has_critical_errors():
             response["has_critical_errors"] = True
-        
+
         return response
     
-    def _execute_webhook(self, response: Dict[str, Any]):
+    def _dispatch_webhook(self, response: Dict[str, Any]) -> None:
+        """
+        Agenda a entrega do webhook em background (fire-and-forget).
+
+        A task fica em _pending_webhooks até concluir, para que o
+        shutdown possa esperar entregas em voo. _execute_webhook já
+        engole as próprias exceções, então não há erro órfão a propagar.
+
+        Args:
+            response: Resposta a enviar no webhook
+        """
+        task = asyncio.create_task(self._execute_webhook(response))
+        self._pending_webhooks.add(task)
+        task.add_done_callback(self._pending_webhooks.discard)
+
+    async def _execute_webhook(self, response: Dict[str, Any]):
         """
         Executa webhook final se configurado.
-        
+
         Args:
             response: Resposta a enviar no webhook
         """
-        import os
-        webhook_url = os.getenv("DEFAULT_WEBHOOK_URL")
-        
+        webhook_url = self._webhook_url
+
         if not webhook_url:
             self.logger.debug("webhook_skipped", reason="no_url_configured")
             return
-        
+
         try:
             self.logger.info(
                 "webhook_execution_start",
                 execution_id=response.get("execution_id"),
                 url=webhook_url
             )
-            
-            webhook_response = self.webhook_client.post(
+
+            # Serializa com orjson (C, bem mais rápido que json.dumps para
+            # respostas grandes) e envia os bytes prontos
+            webhook_response = await self.webhook_client.post(
                 url=webhook_url,
-                json_payload=response
+                data=orjson.dumps(response),
+                headers={"Content-Type": "application/json"}
             )
             
             if webhook_response.is_success:
@@ -365,8 +562,9 @@ class OrchestratorHandler:
                 error=str(e)
             )
     
-    def shutdown(self):
-        """Libera recursos do handler"""
-        self.webhook_client.close()
-        if hasattr(self.flow_executor, 'step_executor'):
-            self.flow_executor.step_executor.close()
\ No newline at end of file
+    async def shutdown(self):
+        """Libera recursos do handler, esperando webhooks em voo"""
+        if self._pending_webhooks:
+            await asyncio.gather(*self._pending_webhooks, return_exceptions=True)
+        await self.webhook_client.close()
+        await self.flow_executor.aclose()
\ No newline at end of file
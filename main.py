@@ -2,18 +2,21 @@
 ML Orchestrator - FastAPI Application
 Entry point para Cloud Run
 """
+import asyncio
 import os
 import time
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
+import orjson
 from fastapi import FastAPI, Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 import uvicorn
 
 from handlers.orchestrator_handler import OrchestratorHandler
+from utils.http_pool import close_session
 from utils.logger import get_logger
 from config.settings import SERVER_CONFIG
 
@@ -41,7 +44,8 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("application_shutdown")
     if orchestrator_handler:
-        orchestrator_handler.shutdown()
+        await orchestrator_handler.shutdown()
+    await close_session()
 
 
 # Criar aplicação FastAPI
@@ -49,22 +53,44 @@ app = FastAPI(
     title="ML Orchestrator",
     description="Sistema de orquestração para funções de Machine Learning",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Todas as respostas JSON saem pelo encoder nativo do orjson
+    default_response_class=ORJSONResponse
 )
 
-# Configurar CORS (ajustar conforme necessário)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Em produção, especificar origens permitidas
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS é opt-in: o orquestrador é chamado servidor-a-servidor (Cloud
+# Functions), onde CORS não se aplica — o middleware só entra no
+# pipeline quando ENABLE_CORS=1, evitando um frame por requisição
+if os.getenv("ENABLE_CORS") == "1":
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=os.getenv("CORS_ORIGINS", "*").split(","),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 
 # Modelos Pydantic para validação
 class OrchestrationRequest(BaseModel):
     """Modelo de requisição para orquestração"""
+
+    # extra="ignore" explícito: chaves desconhecidas são descartadas na
+    # validação em vez de carregadas em __pydantic_extra__ — o modelo é
+    # instanciado a cada POST, então cada alocação por instância conta
+    model_config = ConfigDict(
+        extra="ignore",
+        json_schema_extra={
+            "example": {
+                "user_id": "user123",
+                "session_id": "session456",
+                "create_user_embedding": True,
+                "process_profession_orchestrator": True,
+                "process_vacancy_orchestrator": True
+            }
+        },
+    )
+
     user_id: str = Field(..., description="ID do usuário")
     session_id: str = Field(..., description="ID da sessão")
     create_user_embedding: bool = Field(default=False, description="Se deve criar embeddings do usuário")
@@ -97,25 +123,35 @@ class OrchestrationRequest(BaseModel):
     match_analysis_user_profession_token: str | None = None
     gap_analysis_user_profession_token: str | None = None
     suggest_course_profession_token: str | None = None
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "user_id": "user123",
-                "session_id": "session456",
-                "create_user_embedding": True,
-                "process_profession_orchestrator": True,
-                "process_vacancy_orchestrator": True
-            }
-        }
+
+
+class BatchOrchestrationRequest(BaseModel):
+    """Lote de requisições de orquestração para o endpoint /batch"""
+    requests: list[OrchestrationRequest] = Field(
+        ..., min_length=1, description="Requisições a orquestrar em paralelo"
+    )
+
+
+# Adapter construído uma única vez no import: validate/dump reutilizam o
+# core-schema e os filtros compilados em vez de reconstruí-los por chamada
+_ORCH_ADAPTER = TypeAdapter(OrchestrationRequest)
+
+
+# Caminhos excluídos do access log (o Cloud Run consulta /health com
+# frequência e cada linha de log tem custo de serialização)
+_ACCESS_LOG_SKIP_PATHS = frozenset(("/health",))
 
 
 # Middleware para logging de requisições
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log todas as requisições HTTP"""
-    start_time = time.time()
-    
+    """Log todas as requisições HTTP (exceto health checks)"""
+    if request.url.path in _ACCESS_LOG_SKIP_PATHS:
+        return await call_next(request)
+
+    # perf_counter: relógio monotônico, imune a saltos de NTP
+    start_time = time.perf_counter()
+
     # Log da requisição
     logger.info(
         "http_request_received",
@@ -123,12 +159,12 @@ async def log_requests(request: Request, call_next):
         path=request.url.path,
         client=request.client.host if request.client else None
     )
-    
+
     # Processa requisição
     response = await call_next(request)
-    
+
     # Log da resposta
-    duration = time.time() - start_time
+    duration = time.perf_counter() - start_time
     logger.info(
         "http_request_completed",
         method=request.method,
@@ -136,7 +172,7 @@ async def log_requests(request: Request, call_next):
         status_code=response.status_code,
         duration=duration
     )
-    
+
     return response
 
 
@@ -182,41 +218,102 @@ async def health_check():
         )
 
 
+async def _run_orchestration(request_data: Dict[str, Any]):
+    """
+    Caminho comum dos endpoints de orquestração (payload já validado).
+
+    Recebe o dict pronto, então cada endpoint paga exatamente uma
+    passada de validação Pydantic, sem re-validar na indireção.
+
+    Exceções inesperadas propagam até o global_exception_handler, que é
+    quem loga e monta o 500 — manter um except aqui duplicava o log e a
+    serialização da resposta de erro.
+    """
+    # Chama o handler (assíncrono: não bloqueia o event loop)
+    response_data, status_code = await orchestrator_handler.handle_request(request_data)
+
+    # Se não for 200, retorna erro
+    if status_code != 200:
+        raise HTTPException(
+            status_code=status_code,
+            detail=response_data
+        )
+
+    return response_data
+
+
 @app.post("/orchestrate", tags=["Orchestration"])
 async def orchestrate(request: OrchestrationRequest):
     """
     Endpoint principal para orquestração de fluxos ML.
-    
+
     Executa o fluxo apropriado baseado nos parâmetros fornecidos.
     """
-    try:
-        # Converte modelo Pydantic para dict
-        request_data = request.model_dump(exclude_none=True)
-        
-        # Chama o handler
-        response_data, status_code = orchestrator_handler.handle_request(request_data)
-        
-        # Se não for 200, retorna erro
-        if status_code != 200:
-            raise HTTPException(
-                status_code=status_code,
-                detail=response_data
+    return await _run_orchestration(
+        _ORCH_ADAPTER.dump_python(request, exclude_none=True)
+    )
+
+
+@app.post("/batch", tags=["Orchestration"])
+async def orchestrate_batch(batch: BatchOrchestrationRequest):
+    """
+    Orquestra várias requisições em uma única chamada HTTP.
+
+    As execuções rodam em paralelo via asyncio.gather, amortizando
+    handshake TLS, dispatch do FastAPI e middleware sobre N chamadas.
+    Cada resultado carrega o identifier/user_id da requisição de origem
+    e seu próprio status_code — falhas individuais não derrubam o lote.
+    """
+    payloads = [
+        _ORCH_ADAPTER.dump_python(item, exclude_none=True)
+        for item in batch.requests
+    ]
+
+    outcomes = await asyncio.gather(
+        *[orchestrator_handler.handle_request(payload) for payload in payloads],
+        return_exceptions=True
+    )
+
+    results = []
+    for payload, outcome in zip(payloads, outcomes):
+        entry = {
+            "id": payload.get("identifier"),
+            "user_id": payload.get("user_id"),
+            "session_id": payload.get("session_id"),
+        }
+        if isinstance(outcome, BaseException):
+            logger.error(
+                "batch_item_error",
+                user_id=payload.get("user_id"),
+                error=str(outcome),
+                error_type=type(outcome).__name__
             )
-        
-        return response_data
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(
-            "orchestration_error",
-            error=str(e),
-            error_type=type(e).__name__
-        )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": "Internal server error", "message": str(e)}
-        )
+            entry["status_code"] = 500
+            entry["body"] = {"error": "Internal server error", "message": str(outcome)}
+        else:
+            body, status_code = outcome
+            entry["status_code"] = status_code
+            entry["body"] = body
+        results.append(entry)
+
+    return {"count": len(results), "results": results}
+
+
+@app.post("/orchestrate/stream", tags=["Orchestration"])
+async def orchestrate_stream(request: OrchestrationRequest):
+    """
+    Variante em streaming do /orchestrate (NDJSON).
+
+    Emite um objeto JSON por linha: "start", um "step" por step conforme
+    completa e um "summary" final — o primeiro byte chega com o step
+    mais rápido em vez de esperar o fluxo inteiro.
+    """
+    request_data = _ORCH_ADAPTER.dump_python(request, exclude_none=True)
+
+    return StreamingResponse(
+        orchestrator_handler.handle_request_stream(request_data),
+        media_type="application/x-ndjson"
+    )
 
 
 @app.post("/", tags=["Orchestration"])
@@ -226,30 +323,21 @@ async def orchestrate_root(request: Request):
     Replica o comportamento do endpoint /orchestrate.
     """
     try:
-        # Obtém o JSON da requisição
-        request_data = await request.json()
-        
-        # Valida usando o modelo Pydantic
-        orchestration_request = OrchestrationRequest(**request_data)
-        
-        # Chama o endpoint de orquestração
-        return await orchestrate(orchestration_request)
-        
+        # Parse do corpo com orjson e uma única validação Pydantic
+        request_data = orjson.loads(await request.body())
+        orchestration_request = _ORCH_ADAPTER.validate_python(request_data)
+
+        return await _run_orchestration(
+            _ORCH_ADAPTER.dump_python(orchestration_request, exclude_none=True)
+        )
+
     except ValueError as e:
+        # Corpo inválido (JSON malformado ou falha de validação) → 400;
+        # o resto propaga para o global_exception_handler logar uma vez
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"error": "Invalid request", "message": str(e)}
         )
-    except Exception as e:
-        logger.error(
-            "orchestration_root_error",
-            error=str(e),
-            error_type=type(e).__name__
-        )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": "Internal server error", "message": str(e)}
-        )
 
 
 # Exception handler global
@@ -264,7 +352,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         error_type=type(exc).__name__
     )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": "Internal server error",
@@ -291,12 +379,17 @@ if __name__ == "__main__":
         port=port,
         log_level=log_level
     )
-    
-    # Inicia servidor Uvicorn
+
+    # Inicia servidor Uvicorn: uvloop + httptools (loop e parser HTTP em
+    # C) e um único worker — no Cloud Run a escala é horizontal, um
+    # processo por container. Hot reload só com DEV=1.
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
         log_level=log_level,
-        reload=True  # Hot reload em desenvolvimento
+        loop="uvloop",
+        http="httptools",
+        workers=1,
+        reload=os.getenv("DEV") == "1"
     )
\ No newline at end of file
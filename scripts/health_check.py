@@ -2,30 +2,37 @@
 """
 Health check script para verificar se o serviço está operacional.
 Usado pelo Dockerfile e pode ser executado manualmente.
+
+Usa apenas a stdlib (http.client + json): o probe roda com frequência
+e importar a pilha do requests custa dezenas de ms de cold-start por
+execução em containers pequenos.
 """
-import sys
-import requests
+import http.client
+import json
 import os
+import sys
 
 
 def check_health(host="localhost", port=8080):
     """
     Verifica o health endpoint do serviço.
-    
+
     Args:
         host: Host do serviço
         port: Porta do serviço
-        
+
     Returns:
         0 se saudável, 1 se não saudável
     """
-    url = f"http://{host}:{port}/health"
-    
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+
     try:
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
+        connection.request("GET", "/health")
+        response = connection.getresponse()
+        body = response.read()
+
+        if response.status == 200:
+            data = json.loads(body)
             if data.get("status") == "healthy":
                 print(f"✓ Service is healthy: {data}")
                 return 0
@@ -33,24 +40,26 @@ def check_health(host="localhost", port=8080):
                 print(f"✗ Service unhealthy: {data}")
                 return 1
         else:
-            print(f"✗ Health check failed with status {response.status_code}")
+            print(f"✗ Health check failed with status {response.status}")
             return 1
-            
-    except requests.exceptions.ConnectionError:
-        print(f"✗ Cannot connect to service at {url}")
-        return 1
-    except requests.exceptions.Timeout:
-        print(f"✗ Health check timeout")
+
+    except (ConnectionError, OSError) as e:
+        if isinstance(e, TimeoutError):
+            print("✗ Health check timeout")
+        else:
+            print(f"✗ Cannot connect to service at http://{host}:{port}/health")
         return 1
     except Exception as e:
         print(f"✗ Health check error: {e}")
         return 1
+    finally:
+        connection.close()
 
 
 if __name__ == "__main__":
     # Permite override via variáveis de ambiente
     host = os.getenv("HEALTH_CHECK_HOST", "localhost")
     port = int(os.getenv("PORT", "8080"))
-    
+
     exit_code = check_health(host, port)
-    sys.exit(exit_code)
\ No newline at end of file
+    sys.exit(exit_code)
@@ -0,0 +1,70 @@
+"""
+Circuit Breaker - Disjuntor por serviço para chamadas downstream.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class CircuitBreaker:
+    """
+    Disjuntor clássico de três estados (fechado -> aberto -> meio-aberto).
+
+    Após failure_threshold falhas consecutivas o circuito abre e as
+    chamadas passam a ser negadas por reset_timeout segundos. Vencido o
+    período, uma única chamada de sondagem é liberada: sucesso fecha o
+    circuito, falha reabre pela janela inteira. Assim um endpoint fora
+    do ar é cortado rápido em vez de consumir timeouts inteiros a cada
+    requisição.
+
+    Thread-safe: o caminho legado síncrono executa steps em threads do
+    pool, então as transições de estado são protegidas por lock.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Falhas consecutivas até abrir o circuito
+            reset_timeout: Segundos com o circuito aberto antes da sondagem
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Informa se uma chamada pode prosseguir agora"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+
+            if (not self._probing
+                    and time.monotonic() - self._opened_at >= self.reset_timeout):
+                # Meio-aberto: libera uma única sondagem
+                self._probing = True
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        """Registra uma chamada bem sucedida (fecha o circuito)"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Registra uma falha (pode abrir ou reabrir o circuito)"""
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """True se o circuito está aberto (sondagem à parte)"""
+        with self._lock:
+            return self._opened_at is not None
@@ -0,0 +1,112 @@
+"""
+Dedup - Backends de deduplicação de requisições recentes.
+"""
+import asyncio
+import heapq
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+
+class DedupBackend(Protocol):
+    """Contrato dos backends de deduplicação"""
+
+    async def seen_recently(self, key: str) -> bool:
+        """
+        Registra a chave e informa se ela já foi vista dentro do TTL.
+
+        A verificação e o registro são atômicos: duas chamadas
+        concorrentes com a mesma chave nunca retornam ambas False.
+        """
+        ...
+
+
+class InMemoryDedupBackend:
+    """
+    Deduplicação em processo.
+
+    OrderedDict limitado + min-heap de expiração em relógio monotônico;
+    um asyncio.Lock protege o read-modify-write contra requisições
+    concorrentes no mesmo event loop. Não enxerga outros workers — para
+    deployments multi-worker use o RedisDedupBackend.
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = 10_000):
+        """
+        Args:
+            ttl: Janela de deduplicação em segundos
+            maxsize: Número máximo de chaves rastreadas
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._expiry_heap: list = []
+        self._lock = asyncio.Lock()
+
+    async def seen_recently(self, key: str) -> bool:
+        now = time.monotonic()
+
+        async with self._lock:
+            self._cleanup(now)
+
+            last_seen = self._entries.get(key)
+            if last_seen is not None and now - last_seen < self.ttl:
+                return True
+
+            self._entries[key] = now
+            heapq.heappush(self._expiry_heap, (now + self.ttl, key))
+
+            # Limite rígido de memória mesmo sob tempestade de chaves únicas
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+            return False
+
+    def _cleanup(self, now: float) -> None:
+        """Remove apenas as entradas cujo TTL expirou (O(k) via heap)"""
+        heap = self._expiry_heap
+
+        while heap and heap[0][0] <= now:
+            _, key = heapq.heappop(heap)
+
+            # A chave pode já ter sido descartada pelo limite de tamanho
+            # ou re-registrada com expiração mais recente
+            last_seen = self._entries.get(key)
+            if last_seen is not None and now - last_seen >= self.ttl:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisDedupBackend:
+    """
+    Deduplicação entre workers via Redis.
+
+    Usa SET NX EX, que é atômico no servidor: o primeiro worker a
+    registrar a chave ganha, os demais veem duplicata.
+    """
+
+    def __init__(self, redis_client, ttl: int = 300, key_prefix: str = "ml_orch:dedup:"):
+        """
+        Args:
+            redis_client: Instância de redis.asyncio.Redis
+            ttl: Janela de deduplicação em segundos
+            key_prefix: Prefixo aplicado às chaves no Redis
+        """
+        self._redis = redis_client
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int = 300) -> "RedisDedupBackend":
+        """Cria o backend a partir de uma URL (dependência opcional redis)"""
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url), ttl=ttl)
+
+    async def seen_recently(self, key: str) -> bool:
+        was_set = await self._redis.set(
+            f"{self.key_prefix}{key}", "1", nx=True, ex=self.ttl
+        )
+        return not was_set
@@ -1,13 +1,18 @@
 """
 Cliente HTTP reutilizável com tratamento de erros e logging estruturado.
 """
+import asyncio
+import random
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import aiohttp
+import orjson
 import time
 from typing import Dict, Any, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
+from utils.http_pool import get_session
 from utils.logger import get_logger
 
 
@@ -33,8 +38,18 @@ class HttpResponse:
     method: str
     duration: float
     error: Optional[str] = None
-    headers: Optional[Dict[str, str]] = None
-    
+    # Mapeamento de headers da biblioteca HTTP, guardado como veio; a
+    # maioria dos chamadores nunca lê headers, então a cópia para dict
+    # só acontece sob demanda na property abaixo
+    raw_headers: Optional[Any] = None
+
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        """Headers da resposta como dict (materializado sob demanda)"""
+        if self.raw_headers is None:
+            return None
+        return dict(self.raw_headers)
+
     @property
     def is_success(self) -> bool:
         """Verifica se a requisição foi bem sucedida"""
@@ -52,7 +67,14 @@ class HttpResponse:
 
 
 class HttpClient:
-    """Cliente HTTP com funcionalidades avançadas"""
+    """
+    Cliente HTTP síncrono com funcionalidades avançadas.
+
+    Usado apenas pelo caminho legado de execução em threads; nunca deve
+    ser chamado de dentro do event loop — requisições feitas por
+    corrotinas usam o AsyncHttpClient abaixo, que multiplexa todo o I/O
+    de saída no loop via pool aiohttp compartilhado.
+    """
     
     def __init__(self, 
                  default_timeout: int = 120,
@@ -73,16 +95,33 @@ class HttpClient:
         self.retry_count = retry_count
         self.retry_delay = retry_delay
         self.session = requests.Session()
-        
+
         # Configura headers padrão na sessão
         self.session.headers.update(self.default_headers)
+
+        # Pool de conexões keep-alive dimensionado para steps paralelos
+        # (o default do requests é 10 por host, pouco para grupos largos)
+        adapter = HTTPAdapter(pool_connections=50, pool_maxsize=100)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def _parse_response_body(self, response: requests.Response) -> Any:
-        """Tenta parsear o corpo da resposta"""
-        try:
-            return response.json()
-        except json.JSONDecodeError:
-            return response.text
+        """
+        Tenta parsear o corpo da resposta.
+
+        Trabalha direto sobre response.content: uma única passada sobre
+        os bytes, sem materializar response.text (que refaz o decode
+        UTF-8 do corpo inteiro só para ser descartado). O content-type
+        decide o caminho antes de tentar o parse: desenrolar exceção a
+        cada página de erro HTML custa bem mais que o branch.
+        """
+        content_type = response.headers.get("content-type", "")
+        if "json" in content_type:
+            try:
+                return orjson.loads(response.content)
+            except orjson.JSONDecodeError:
+                pass
+        return response.content.decode("utf-8", errors="replace")
     
     def _execute_request(self, 
                         method: Union[str, HttpMethod],
@@ -95,27 +134,31 @@ class HttpClient:
         """Executa uma requisição HTTP com tratamento de erros"""
         
         timeout = timeout or self.default_timeout
-        request_headers = {**self.session.headers}
-        
-        if headers:
-            request_headers.update(headers)
-        
+
+        # Serializa o payload uma única vez e envia como data=: passar
+        # json= faria o requests re-serializar o mesmo dict que já foi
+        # percorrido para medir payload_size (um encode O(N) redundante)
+        if json_payload is not None and data is None:
+            data = orjson.dumps(json_payload)
+            if not headers or not any(k.lower() == "content-type" for k in headers):
+                headers = {**(headers or {}), "Content-Type": "application/json"}
+
         start_time = time.time()
-        
+
         try:
-            # Log da requisição
+            # Log da requisição (só os overrides da chamada; os headers da
+            # sessão são fixos e o merge fica por conta do requests)
             logger.log_http_request(
                 method=method,
                 url=url,
-                headers=request_headers,
-                payload_size=len(json.dumps(json_payload)) if json_payload else 0
+                headers=headers,
+                payload_size=len(data) if data else 0
             )
-            
+
             response = self.session.request(
                 method=method,
                 url=url,
-                headers=request_headers,
-                json=json_payload,
+                headers=headers,
                 data=data,
                 params=params,
                 timeout=timeout
@@ -132,7 +175,7 @@ class HttpClient:
                 url=url,
                 status_code=response.status_code,
                 duration=duration,
-                response_size=len(response.text)
+                response_size=len(response.content)
             )
             
             return HttpResponse(
@@ -142,7 +185,7 @@ class HttpClient:
                 url=url,
                 method=method,
                 duration=duration,
-                headers=dict(response.headers)
+                raw_headers=response.headers
             )
             
         except requests.exceptions.Timeout:
@@ -236,7 +279,10 @@ class HttpClient:
                     attempt=attempt,
                     max_attempts=self.retry_count + 1
                 )
-                time.sleep(self.retry_delay * attempt)  # Backoff exponencial simples
+                # Backoff exponencial limitado, com jitter para não
+                # sincronizar as tentativas de workers concorrentes
+                time.sleep(min(self.retry_delay * (2 ** (attempt - 1)), 4.0)
+                           + random.random() * 0.2)
             
             response = self._execute_request(method, url, **kwargs)
             last_response = response
@@ -280,7 +326,240 @@ class HttpClient:
     def __enter__(self):
         """Suporte para context manager"""
         return self
-    
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Fecha a sessão ao sair do context manager"""
-        self.close()
\ No newline at end of file
+        self.close()
+
+
+class AsyncHttpClient:
+    """Cliente HTTP assíncrono baseado em aiohttp com pool compartilhado"""
+
+    def __init__(self,
+                 default_timeout: int = 120,
+                 default_headers: Optional[Dict[str, str]] = None,
+                 retry_count: int = 0,
+                 retry_delay: float = 1.0):
+        """
+        Inicializa o cliente HTTP assíncrono.
+
+        Todas as instâncias usam a sessão única de utils.http_pool, então
+        steps e webhook compartilham o mesmo pool de conexões keep-alive.
+
+        Args:
+            default_timeout: Timeout padrão em segundos
+            default_headers: Headers padrão para todas as requisições
+            retry_count: Número de tentativas em caso de erro
+            retry_delay: Delay entre tentativas em segundos
+        """
+        self.default_timeout = default_timeout
+        self.default_headers = default_headers or {}
+        self.retry_count = retry_count
+        self.retry_delay = retry_delay
+
+    async def _parse_response_body(self, response: aiohttp.ClientResponse) -> Any:
+        """
+        Tenta parsear o corpo da resposta (uma passada sobre os bytes).
+
+        Só tenta JSON quando o content-type indica JSON — mesma razão do
+        cliente síncrono: branch em vez de exceção para corpos não-JSON.
+        """
+        raw = await response.read()
+        if "json" in (response.content_type or ""):
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass
+        return raw.decode("utf-8", errors="replace")
+
+    async def _execute_request(self,
+                              method: Union[str, HttpMethod],
+                              url: str,
+                              headers: Optional[Dict[str, str]] = None,
+                              json_payload: Optional[Dict[str, Any]] = None,
+                              data: Optional[Union[str, bytes]] = None,
+                              params: Optional[Dict[str, Any]] = None,
+                              timeout: Optional[int] = None) -> HttpResponse:
+        """Executa uma requisição HTTP assíncrona com tratamento de erros"""
+
+        timeout = timeout or self.default_timeout
+        session = get_session()
+
+        # Headers padrão do cliente mesclados com os da requisição
+        # (a sessão é compartilhada, então não carrega headers próprios)
+        request_headers = self.default_headers
+        if headers:
+            request_headers = {**self.default_headers, **headers}
+
+        # Serializa o payload uma única vez e envia como data=: passar
+        # json= faria o aiohttp re-serializar o mesmo dict que já foi
+        # percorrido para medir payload_size (um encode O(N) redundante)
+        if json_payload is not None and data is None:
+            data = orjson.dumps(json_payload)
+            if not any(k.lower() == "content-type" for k in request_headers):
+                request_headers = {**request_headers, "Content-Type": "application/json"}
+
+        start_time = time.time()
+
+        try:
+            # Log da requisição
+            logger.log_http_request(
+                method=method,
+                url=url,
+                headers=request_headers,
+                payload_size=len(data) if data else 0
+            )
+
+            async with session.request(
+                method=method,
+                url=url,
+                headers=request_headers,
+                data=data,
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                duration = time.time() - start_time
+                body = await self._parse_response_body(response)
+
+                status = "success" if response.status < 400 else "failed"
+
+                # Log da resposta
+                logger.log_http_request(
+                    method=method,
+                    url=url,
+                    status_code=response.status,
+                    duration=duration
+                )
+
+                return HttpResponse(
+                    status_code=response.status,
+                    body=body,
+                    status=status,
+                    url=url,
+                    method=method,
+                    duration=duration,
+                    raw_headers=response.headers
+                )
+
+        except asyncio.TimeoutError:
+            duration = time.time() - start_time
+            logger.error(
+                "http_timeout",
+                method=method,
+                url=url,
+                timeout=timeout,
+                duration=duration
+            )
+
+            return HttpResponse(
+                status_code=0,
+                body=None,
+                status="timeout",
+                url=url,
+                method=method,
+                duration=duration,
+                error=f"Request timeout after {timeout}s"
+            )
+
+        except aiohttp.ClientConnectionError as e:
+            duration = time.time() - start_time
+            logger.error(
+                "http_connection_error",
+                method=method,
+                url=url,
+                error=str(e),
+                duration=duration
+            )
+
+            return HttpResponse(
+                status_code=0,
+                body=None,
+                status="connection_error",
+                url=url,
+                method=method,
+                duration=duration,
+                error=f"Connection error: {str(e)}"
+            )
+
+        except aiohttp.ClientError as e:
+            duration = time.time() - start_time
+            logger.error(
+                "http_request_error",
+                method=method,
+                url=url,
+                error=str(e),
+                error_type=type(e).__name__,
+                duration=duration
+            )
+
+            return HttpResponse(
+                status_code=0,
+                body=None,
+                status="error",
+                url=url,
+                method=method,
+                duration=duration,
+                error=f"Request failed: {str(e)}"
+            )
+
+    async def request(self,
+                     method: Union[str, HttpMethod],
+                     url: str,
+                     **kwargs) -> HttpResponse:
+        """
+        Executa uma requisição HTTP assíncrona com retry automático.
+
+        Args:
+            method: Método HTTP
+            url: URL da requisição
+            **kwargs: Argumentos adicionais (headers, json_payload, data, params, timeout)
+
+        Returns:
+            HttpResponse com o resultado da requisição
+        """
+        last_response = None
+
+        for attempt in range(self.retry_count + 1):
+            if attempt > 0:
+                logger.info(
+                    "http_retry",
+                    method=method,
+                    url=url,
+                    attempt=attempt,
+                    max_attempts=self.retry_count + 1
+                )
+                # Backoff exponencial limitado, com jitter para não
+                # sincronizar as tentativas de workers concorrentes
+                await asyncio.sleep(min(self.retry_delay * (2 ** (attempt - 1)), 4.0)
+                                    + random.random() * 0.2)
+
+            response = await self._execute_request(method, url, **kwargs)
+            last_response = response
+
+            # Não faz retry em caso de sucesso ou erro do cliente
+            if response.is_success or response.is_client_error:
+                return response
+
+            # Só faz retry em erros de servidor ou timeout
+            if attempt < self.retry_count and (response.is_server_error or response.status_code == 0):
+                continue
+
+            return response
+
+        return last_response
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        """Executa requisição GET assíncrona"""
+        return await self.request(HttpMethod.GET, url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> HttpResponse:
+        """Executa requisição POST assíncrona"""
+        return await self.request(HttpMethod.POST, url, **kwargs)
+
+    async def close(self):
+        """
+        Noop mantido por compatibilidade.
+
+        A sessão pertence a utils.http_pool e é fechada uma única vez no
+        shutdown da aplicação via close_session().
+        """
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Pool HTTP compartilhado - uma única sessão aiohttp por processo.
+"""
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+
+# Limites do pool de conexões (keep-alive entre requisições evita pagar
+# TCP + TLS por step em rotas quentes)
+_POOL_LIMIT = 100
+_POOL_LIMIT_PER_HOST = 20
+_KEEPALIVE_TIMEOUT = 75
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Retorna a sessão aiohttp compartilhada do processo.
+
+    Criada de forma lazy no event loop atual; se o loop mudou (ex:
+    asyncio.run em testes) ou a sessão foi fechada, uma nova é criada.
+    Todos os clientes (steps, webhook) usam o mesmo pool de conexões.
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+
+    if (_session is None
+            or _session.closed
+            or _session_loop is not loop):
+        connector = aiohttp.TCPConnector(
+            limit=_POOL_LIMIT,
+            limit_per_host=_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=_KEEPALIVE_TIMEOUT
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+
+    return _session
+
+
+async def close_session() -> None:
+    """Fecha a sessão compartilhada (chamado no shutdown da aplicação)"""
+    global _session, _session_loop
+
+    if _session and not _session.closed:
+        await _session.close()
+
+    _session = None
+    _session_loop = None
@@ -3,12 +3,28 @@ Sistema de logging estruturado para o ML Orchestrator.
 Fornece logs em formato JSON para melhor observabilidade.
 """
 import logging
-import json
 import time
 import sys
+
+import orjson
 from typing import Dict, Any, Optional
 from contextlib import contextmanager
-from datetime import datetime
+
+
+# Cache do prefixo de timestamp, renovado no máximo uma vez por segundo:
+# construir datetime + isoformat() a cada linha custa ~1μs e acontece
+# várias vezes por request; só os milissegundos mudam dentro do segundo
+_TS_CACHE = [0, ""]
+
+
+def _format_timestamp() -> str:
+    """Timestamp ISO-8601 UTC com milissegundos (prefixo cacheado)"""
+    now = time.time()
+    second = int(now)
+    if second != _TS_CACHE[0]:
+        _TS_CACHE[0] = second
+        _TS_CACHE[1] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+    return f"{_TS_CACHE[1]}.{int((now - second) * 1000):03d}Z"
 
 
 class StructuredLogger:
@@ -17,6 +33,9 @@ class StructuredLogger:
     def __init__(self, name: str = "ml_orchestrator"):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
+
+        # Nome resolvido uma vez (cada linha de log o inclui)
+        self._name = name
         
         # Evita duplicação de handlers
         if not self.logger.handlers:
@@ -28,41 +47,50 @@ class StructuredLogger:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
     
+    def isEnabledFor(self, level: int) -> bool:
+        """Verifica se o nível de log está habilitado no logger subjacente"""
+        return self.logger.isEnabledFor(level)
+
     def _create_log_entry(self, event: str, level: str = "INFO", **kwargs) -> Dict[str, Any]:
         """Cria uma entrada de log estruturada"""
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": _format_timestamp(),
             "level": level,
             "event": event,
-            "logger": self.logger.name
+            "logger": self._name
         }
-        
+
         # Adiciona campos extras
         for key, value in kwargs.items():
             if value is not None:
                 log_entry[key] = value
-        
+
         return log_entry
-    
+
+    @staticmethod
+    def _serialize(log_entry: Dict[str, Any]) -> str:
+        """Serializa a entrada com orjson (C); tipos exóticos viram str"""
+        return orjson.dumps(log_entry, default=str).decode()
+
     def info(self, event: str, **kwargs):
         """Log de nível INFO"""
         log_entry = self._create_log_entry(event, "INFO", **kwargs)
-        self.logger.info(json.dumps(log_entry))
-    
+        self.logger.info(self._serialize(log_entry))
+
     def error(self, event: str, **kwargs):
         """Log de nível ERROR"""
         log_entry = self._create_log_entry(event, "ERROR", **kwargs)
-        self.logger.error(json.dumps(log_entry))
-    
+        self.logger.error(self._serialize(log_entry))
+
     def warning(self, event: str, **kwargs):
         """Log de nível WARNING"""
         log_entry = self._create_log_entry(event, "WARNING", **kwargs)
-        self.logger.warning(json.dumps(log_entry))
-    
+        self.logger.warning(self._serialize(log_entry))
+
     def debug(self, event: str, **kwargs):
         """Log de nível DEBUG"""
         log_entry = self._create_log_entry(event, "DEBUG", **kwargs)
-        self.logger.debug(json.dumps(log_entry))
+        self.logger.debug(self._serialize(log_entry))
     
     def log_execution_start(self, execution_id: str, flow_name: str, user_id: str, **kwargs):
         """Log especializado para início de execução"""